@@ -0,0 +1,7 @@
+"""Markdown descriptions for the OpenAPI docs"""
+from importlib.resources import files
+
+
+def load_doc(name: str) -> str:
+    """Read the Markdown description ``<name>.md`` shipped with this package"""
+    return files(__name__).joinpath(f"{name}.md").read_text(encoding="utf-8")
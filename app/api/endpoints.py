@@ -1,85 +1,232 @@
 """API endpoints for the code review system"""
-from fastapi import APIRouter, HTTPException
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, TypeAdapter
 from app.models.schemas import (
     AnalyzePRRequest,
     TaskSubmissionResponse,
     TaskStatusResponse,
     TaskResultResponse,
-    TaskStatus
+    TaskStatus,
+    TASK_STATUS_ADAPTER,
+    TASK_RESULT_ADAPTER
 )
+from app.api._docs import load_doc
+from app.api.responses import FastJSONResponse
 from app.services import task_service
 
 
 router = APIRouter()
 
 
-@router.post(
-    "/analyze-pr", 
-    response_model=TaskSubmissionResponse,
-    tags=["Code Analysis"],
-    summary="Submit PR for Code Analysis",
-    description="""**Submit a GitHub Pull Request for comprehensive AI-powered code analysis.**
-
-This endpoint accepts a GitHub repository URL and PR number, then initiates an asynchronous analysis task that examines the code changes for:
-
-- **Style Issues**: Code formatting, naming conventions, organization
-- **Bug Detection**: Potential errors, null pointer exceptions, logic issues
-- **Performance**: Inefficient algorithms, memory usage, optimization opportunities  
-- **Best Practices**: Design patterns, maintainability, security considerations
+# OpenAPI response examples, kept at module level so the route decorators stay readable
+TASK_NOT_FOUND_RESPONSE = {
+    "description": "Task not found",
+    "content": {
+        "application/json": {
+            "example": {
+                "detail": "Task not found"
+            }
+        }
+    }
+}
 
-## Analysis Modes
 
-- **AI Analysis**: Uses OpenAI GPT-4o-mini for intelligent code review (when API key configured)
-- **Rule-based Fallback**: Automatic fallback to pattern-based analysis if AI unavailable
+TASK_BACKEND_UNAVAILABLE_RESPONSE = {
+    "description": "Task backend unavailable",
+    "content": {
+        "application/json": {
+            "example": {
+                "detail": "Task backend unavailable"
+            }
+        }
+    }
+}
 
-## Authentication
 
-- **GitHub Token**: Optional but recommended for private repos and higher rate limits
-- **Public Repos**: Can analyze without token (subject to GitHub rate limits)
+ANALYZE_PR_RESPONSES = {
+    200: {
+        "description": "Analysis task submitted successfully",
+        "content": {
+            "application/json": {
+                "example": {
+                    "task_id": "abc123-def456-ghi789",
+                    "status": "pending",
+                    "message": "Analysis task submitted successfully"
+                }
+            }
+        }
+    },
+    422: {
+        "description": "Invalid request data",
+        "content": {
+            "application/json": {
+                "example": {
+                    "detail": [
+                        {
+                            "loc": ["body", "repo_url"],
+                            "msg": "invalid or missing URL",
+                            "type": "value_error"
+                        }
+                    ]
+                }
+            }
+        }
+    },
+    500: {
+        "description": "Server error during task submission"
+    }
+}
 
-## Response
 
-Returns a task ID that can be used to check analysis status and retrieve results.""",
-    response_description="Task submission confirmation with unique task ID",
-    responses={
-        200: {
-            "description": "Analysis task submitted successfully",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "task_id": "abc123-def456-ghi789",
-                        "status": "pending",
-                        "message": "Analysis task submitted successfully"
+TASK_STATUS_RESPONSES = {
+    200: {
+        "description": "Task status retrieved successfully",
+        "content": {
+            "application/json": {
+                "examples": {
+                    "pending": {
+                        "summary": "Task Pending",
+                        "value": {
+                            "task_id": "abc123-def456-ghi789",
+                            "status": "pending"
+                        }
+                    },
+                    "processing": {
+                        "summary": "Task Processing", 
+                        "value": {
+                            "task_id": "abc123-def456-ghi789",
+                            "status": "processing"
+                        }
+                    },
+                    "completed": {
+                        "summary": "Task Completed",
+                        "value": {
+                            "task_id": "abc123-def456-ghi789", 
+                            "status": "completed"
+                        }
                     }
                 }
             }
-        },
-        422: {
-            "description": "Invalid request data",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": [
-                            {
-                                "loc": ["body", "repo_url"],
-                                "msg": "invalid or missing URL",
-                                "type": "value_error"
-                            }
-                        ]
+        }
+    },
+    404: TASK_NOT_FOUND_RESPONSE,
+    503: TASK_BACKEND_UNAVAILABLE_RESPONSE
+}
+
+
+TASK_RESULTS_RESPONSES = {
+    200: {
+        "description": "Analysis results retrieved successfully",
+        "content": {
+            "application/json": {
+                "examples": {
+                    "completed_with_results": {
+                        "summary": "Completed Analysis",
+                        "value": {
+                            "task_id": "abc123-def456-ghi789",
+                            "status": "completed",
+                            "results": {
+                                "files": [
+                                    {
+                                        "name": "src/main.py",
+                                        "issues": [
+                                            {
+                                                "type": "style",
+                                                "line": 15,
+                                                "description": "Line too long (120 characters)",
+                                                "suggestion": "Break line into multiple lines"
+                                            },
+                                            {
+                                                "type": "bug", 
+                                                "line": 23,
+                                                "description": "Potential null pointer exception",
+                                                "suggestion": "Add null check before accessing object"
+                                            }
+                                        ]
+                                    }
+                                ],
+                                "summary": {
+                                    "total_files": 1,
+                                    "total_issues": 2,
+                                    "critical_issues": 1
+                                }
+                            },
+                            "error": None
+                        }
+                    },
+                    "failed_task": {
+                        "summary": "Failed Analysis",
+                        "value": {
+                            "task_id": "abc123-def456-ghi789",
+                            "status": "failed", 
+                            "results": None,
+                            "error": "GitHub repository not found or access denied"
+                        }
+                    },
+                    "pending_task": {
+                        "summary": "Pending Analysis",
+                        "value": {
+                            "task_id": "abc123-def456-ghi789",
+                            "status": "processing",
+                            "results": None,
+                            "error": None
+                        }
                     }
                 }
             }
-        },
-        500: {
-            "description": "Server error during task submission"
         }
-    }
+    },
+    404: TASK_NOT_FOUND_RESPONSE,
+    503: TASK_BACKEND_UNAVAILABLE_RESPONSE
+}
+
+
+# Completed results never change and expire from the backend after an hour (result_expires)
+COMPLETED_RESULT_CACHE_CONTROL = "public, max-age=3600, immutable"
+
+# A status can change between polls, so clients must revalidate it with If-None-Match every time
+STATUS_CACHE_CONTROL = "no-cache"
+
+
+def _json_response(adapter: TypeAdapter, model: BaseModel, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize a response model straight to JSON bytes, bypassing FastAPI's re-validation"""
+    return Response(content=adapter.dump_json(model), media_type=FastJSONResponse.media_type, headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _conditional_headers(
+    request: Request, task_id: str, status: TaskStatus, cache_control: str
+) -> Tuple[Dict[str, str], Optional[Response]]:
+    """Build the ETag headers for a task's status, plus a 304 response if the client already has it"""
+    etag = f'"{task_id}-{status.value}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return headers, Response(status_code=304, headers=headers)
+    return headers, None
+
+
+@router.post(
+    "/analyze-pr", 
+    response_model=TaskSubmissionResponse,
+    tags=["Code Analysis"],
+    summary="Submit PR for Code Analysis",
+    description=load_doc("analyze_pr"),
+    response_description="Task submission confirmation with unique task ID",
+    responses=ANALYZE_PR_RESPONSES
 )
-async def analyze_pr(request: AnalyzePRRequest):
+def analyze_pr(request: AnalyzePRRequest):
     """Submit a GitHub Pull Request for comprehensive code analysis"""
     try:
         task_id = task_service.submit_analysis_task(
-            str(request.repo_url), 
+            request.repo_url, 
             request.pr_number, 
             request.github_token
         )
@@ -98,82 +245,27 @@ async def analyze_pr(request: AnalyzePRRequest):
     response_model=TaskStatusResponse,
     tags=["Code Analysis"],
     summary="Check Analysis Task Status",
-    description="""
-    **Check the current status of a code analysis task.**
-    
-    Use this endpoint to monitor the progress of your submitted analysis task. 
-    The task goes through several states during processing:
-    
-    ## Task States
-    
-    - **pending** - Task queued, waiting to start
-    - **processing** - Analysis in progress (fetching PR data, running analysis)
-    - **completed** - Analysis finished successfully, results available
-    - **failed** - Analysis encountered an error
-    
-    ## Polling Guidelines
-    
-    - **Recommended interval**: 2-5 seconds for active monitoring
-    - **Timeout**: Most analysis tasks complete within 30-60 seconds
-    - **Long-running tasks**: Large PRs may take 2-3 minutes
-    
-    ## Next Steps
-    
-    - If status is `completed`, call `/results/{task_id}` to get analysis results
-    - If status is `failed`, check the error details in `/results/{task_id}`
-    """,
+    description=load_doc("task_status"),
     response_description="Current task status and metadata",
-    responses={
-        200: {
-            "description": "Task status retrieved successfully",
-            "content": {
-                "application/json": {
-                    "examples": {
-                        "pending": {
-                            "summary": "Task Pending",
-                            "value": {
-                                "task_id": "abc123-def456-ghi789",
-                                "status": "pending"
-                            }
-                        },
-                        "processing": {
-                            "summary": "Task Processing", 
-                            "value": {
-                                "task_id": "abc123-def456-ghi789",
-                                "status": "processing"
-                            }
-                        },
-                        "completed": {
-                            "summary": "Task Completed",
-                            "value": {
-                                "task_id": "abc123-def456-ghi789", 
-                                "status": "completed"
-                            }
-                        }
-                    }
-                }
-            }
-        },
-        404: {
-            "description": "Task not found",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Task not found"
-                    }
-                }
-            }
-        }
-    }
+    responses=TASK_STATUS_RESPONSES
 )
-async def get_task_status(task_id: str):
+def get_task_status(task_id: str, request: Request):
     """Get the current status of an analysis task"""
-    status = task_service.get_task_status(task_id)
+    try:
+        status = task_service.get_task_status(task_id)
+    except task_service.TaskBackendError:
+        # The task may well exist; the caller should retry rather than treat it as unknown
+        raise HTTPException(status_code=503, detail="Task backend unavailable")
     
     if status is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return TaskStatusResponse(task_id=task_id, status=status)
+    # Pollers send back the last ETag and get an empty 304 until the status changes
+    headers, not_modified = _conditional_headers(request, task_id, status, STATUS_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    
+    return _json_response(TASK_STATUS_ADAPTER, TaskStatusResponse(task_id=task_id, status=status), headers)
 
 
 @router.get(
@@ -181,130 +273,33 @@ async def get_task_status(task_id: str):
     response_model=TaskResultResponse,
     tags=["Code Analysis"],
     summary="Get Analysis Results",
-    description="""
-    **Retrieve the complete analysis results for a completed task.**
-    
-    This endpoint returns the detailed code analysis results including all detected issues,
-    suggestions, and summary statistics.
-    
-    ## Analysis Results Include
-    
-    ### File-level Analysis
-    - **Individual file reports** with specific issues found
-    - **Line-by-line feedback** with exact locations
-    - **Issue categorization** by type and severity
-    
-    ### Issue Types
-    - **Style**: Code formatting, naming conventions, organization
-    - **Bug**: Potential errors, null pointer exceptions, logic issues
-    - **Performance**: Inefficient algorithms, memory usage, optimization opportunities  
-    - **Best Practice**: Design patterns, maintainability, security considerations
-    
-    ### Summary Statistics
-    - **Total files analyzed**
-    - **Total issues found**
-    - **Critical issues count**
-    - **Issue breakdown by type**
-    
-    ## Task Status Requirements
-    
-    - **Completed tasks**: Returns full analysis results
-    - **Failed tasks**: Returns error information 
-    - **Pending/Processing tasks**: Returns status without results
-    
-    ## Result Structure
-    
-    Each issue includes:
-    - **Type**: Category of the issue
-    - **Line number**: Exact location in the file
-    - **Description**: What the issue is
-    - **Suggestion**: How to fix it
-    """,
+    description=load_doc("task_results"),
     response_description="Complete analysis results with issues and suggestions",
-    responses={
-        200: {
-            "description": "Analysis results retrieved successfully",
-            "content": {
-                "application/json": {
-                    "examples": {
-                        "completed_with_results": {
-                            "summary": "Completed Analysis",
-                            "value": {
-                                "task_id": "abc123-def456-ghi789",
-                                "status": "completed",
-                                "results": {
-                                    "files": [
-                                        {
-                                            "name": "src/main.py",
-                                            "issues": [
-                                                {
-                                                    "type": "style",
-                                                    "line": 15,
-                                                    "description": "Line too long (120 characters)",
-                                                    "suggestion": "Break line into multiple lines"
-                                                },
-                                                {
-                                                    "type": "bug", 
-                                                    "line": 23,
-                                                    "description": "Potential null pointer exception",
-                                                    "suggestion": "Add null check before accessing object"
-                                                }
-                                            ]
-                                        }
-                                    ],
-                                    "summary": {
-                                        "total_files": 1,
-                                        "total_issues": 2,
-                                        "critical_issues": 1
-                                    }
-                                },
-                                "error": None
-                            }
-                        },
-                        "failed_task": {
-                            "summary": "Failed Analysis",
-                            "value": {
-                                "task_id": "abc123-def456-ghi789",
-                                "status": "failed", 
-                                "results": None,
-                                "error": "GitHub repository not found or access denied"
-                            }
-                        },
-                        "pending_task": {
-                            "summary": "Pending Analysis",
-                            "value": {
-                                "task_id": "abc123-def456-ghi789",
-                                "status": "processing",
-                                "results": None,
-                                "error": None
-                            }
-                        }
-                    }
-                }
-            }
-        },
-        404: {
-            "description": "Task not found",
-            "content": {
-                "application/json": {
-                    "example": {
-                        "detail": "Task not found"
-                    }
-                }
-            }
-        }
-    }
+    responses=TASK_RESULTS_RESPONSES
 )
-async def get_task_results(task_id: str):
+def get_task_results(task_id: str, request: Request):
     """Get the complete analysis results for a task"""
-    status, result, error = task_service.get_task_result(task_id)
+    try:
+        status, result, error = task_service.get_task_result(task_id)
+    except task_service.TaskBackendError:
+        raise HTTPException(status_code=503, detail="Task backend unavailable")
     
     if status is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    return TaskResultResponse(
+    headers = None
+    if status in task_service.FINISHED_STATUSES:
+        # A failed task can still be redelivered and succeed, so only completed results are immutable
+        cache_control = (
+            COMPLETED_RESULT_CACHE_CONTROL if status is TaskStatus.COMPLETED else STATUS_CACHE_CONTROL
+        )
+        headers, not_modified = _conditional_headers(request, task_id, status, cache_control)
+        if not_modified is not None:
+            return not_modified
+    
+    return _json_response(TASK_RESULT_ADAPTER, TaskResultResponse(
         task_id=task_id,
         status=status,
         results=result,
         error=error
-    )
+    ), headers)
@@ -0,0 +1,143 @@
+"""Lightweight caches shared by the services"""
+import hashlib
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Root directory for on-disk caches shared by all worker processes on a host
+CACHE_DIR = os.path.expanduser(os.getenv("CACHE_DIR", "~/.cra-cache"))
+
+
+class TTLCache:
+    """Thread-safe in-process cache where every entry carries its own time-to-live"""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value for ``ttl`` seconds"""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self) -> None:
+        """Drop expired entries, or the oldest insert if everything is still live"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            del self._data[next(iter(self._data))]
+
+
+class FileCache:
+    """JSON-on-disk cache with per-entry time-to-live, shared between processes
+
+    The cache is best-effort: unreadable entries count as misses and write
+    failures are logged, never raised. Each entry file's mtime is set to its
+    expiry time, and because most keys are never read again, every
+    ``prune_every`` writes (starting with a process's first write) a background
+    thread deletes the files whose mtime has passed.
+    """
+
+    def __init__(self, directory: str, prune_every: int = 100):
+        self.directory = Path(directory)
+        self.prune_every = prune_every
+        self._writes = itertools.count()
+        self._prune_lock = threading.Lock()
+        self._prune_thread: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("data")
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serializable value for ``ttl`` seconds"""
+        expires_at = time.time() + ttl
+        entry = {"expires_at": expires_at, "data": value}
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.utime(tmp_path, (expires_at, expires_at))
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to write cache entry to {self.directory}: {e}")
+            return
+
+        if next(self._writes) % self.prune_every == 0 and self._prune_lock.acquire(blocking=False):
+            self._prune_thread = threading.Thread(target=self._prune_in_background, daemon=True)
+            self._prune_thread.start()
+
+    def prune(self) -> None:
+        """Delete entries whose expiry time (the file's mtime) has passed"""
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime <= now:
+                    path.unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to prune cache entry {path}: {e}")
+
+    def _prune_in_background(self) -> None:
+        try:
+            self.prune()
+        finally:
+            self._prune_lock.release()
+
+    def clear(self) -> None:
+        """Delete every entry in the cache directory"""
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
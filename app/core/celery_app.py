@@ -5,6 +5,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# PR analysis is almost entirely network wait (GitHub + OpenAI), so it runs on its own queue
+# served by a high-concurrency thread-pool worker
+IO_QUEUE = "io"
+
 # Celery configuration
 celery_app = Celery(
     "code_review_agent",
@@ -31,4 +35,22 @@ celery_app.conf.update(
     result_expires=3600,  # 1 hour
     # Better exception serialization
     task_send_sent_event=True,
+    task_routes={
+        "app.tasks.analysis_tasks.analyze_pr_task": {"queue": IO_QUEUE},
+    },
+    # Keep warm broker connections for bursts of task submissions from the API
+    broker_pool_limit=50,
+    broker_transport_options={
+        "socket_keepalive": True,
+        "health_check_interval": 30,
+        # Late-acked tasks are redelivered if unacked this long, so it must exceed the longest run.
+        # Thread-pool workers ignore task_time_limit/task_soft_time_limit. analyze_pr_task instead
+        # checks task_soft_time_limit itself after the GitHub fetch and fails for good (no retry)
+        # once it is past it. GITHUB_TIMEOUT and OPENAI_TIMEOUT bound each request in between.
+        "visibility_timeout": 60 * 60,
+    },
+    # Reuse long-lived sockets for status/result reads too. The pool is left uncapped: it never
+    # holds more connections than API threads, and a capped pool raises instead of waiting.
+    redis_socket_keepalive=True,
+    redis_backend_health_check_interval=30,
 )
\ No newline at end of file
@@ -1,43 +1,35 @@
 """Main FastAPI application"""
+import os
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
+from app.api._docs import load_doc
 from app.api.endpoints import router
+from app.api.responses import FastJSONResponse
 from scalar_fastapi import get_scalar_api_reference
 
 
-app = FastAPI(
-    title="Code Review Agent API",
-    description="""**Autonomous AI-powered code review system for GitHub Pull Requests**
-
-This API provides comprehensive code analysis capabilities using advanced AI models and rule-based analysis to review GitHub Pull Requests automatically.
-
-## Key Features
-
-- 🤖 **AI-Powered Analysis**: Uses OpenAI GPT-4o-mini for intelligent code review
-- 🔄 **Automatic Fallback**: Rule-based analysis when AI is unavailable  
-- ⚡ **Asynchronous Processing**: Non-blocking analysis with task tracking
-- 🔍 **Comprehensive Detection**: Style, bugs, performance, and best practices
-- 🔐 **Secure**: GitHub token authentication and webhook signature verification
-
-## Analysis Capabilities
-
-- **Style Issues**: Formatting, naming conventions, code organization
-- **Bug Detection**: Potential errors, null pointers, logic issues
-- **Performance**: Algorithm efficiency, memory usage, optimizations
-- **Best Practices**: Design patterns, maintainability, security
+# Task endpoints are sync and run in the threadpool because Celery/Redis calls block
+THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "200"))
 
-## Getting Started
 
-1. **Submit Analysis**: POST to `/analyze-pr` with GitHub repo and PR number
-2. **Monitor Progress**: GET `/status/{task_id}` to check analysis status  
-3. **Get Results**: GET `/results/{task_id}` when analysis completes
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure shared resources for the lifetime of the app"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # FastAPI memoizes the schema on first build; do it now instead of on the first /docs hit
+    app.openapi()
+    yield
 
-## Authentication
 
-- **GitHub Token**: Recommended for private repos and higher rate limits
-- **Public Access**: Basic analysis available without authentication""",
+app = FastAPI(
+    title="Code Review Agent API",
+    description=load_doc("api"),
     version="1.0.0",
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     contact={
         "name": "Code Review Agent",
         "url": "https://github.com/sarim2000/code-review-agent",
@@ -69,22 +61,7 @@ app.include_router(router)
     "/",
     tags=["System"],
     summary="API Welcome",
-    description="""
-    **Welcome endpoint providing basic API information.**
-    
-    This endpoint serves as the main entry point to the Code Review Agent API.
-    It provides basic information about the service and current version.
-    
-    ## Use Cases
-    
-    - **Health verification**: Confirm the API is running
-    - **Version checking**: Get current API version
-    - **Service discovery**: Basic service information
-    
-    ## Response
-    
-    Returns welcome message and version information.
-    """,
+    description=load_doc("root"),
     response_description="API welcome message and version",
     responses={
         200: {
@@ -117,31 +94,7 @@ async def docs():
     "/health",
     tags=["System"],
     summary="Health Check",
-    description="""
-    **System health and readiness check endpoint.**
-    
-    This endpoint provides health status information for monitoring and load balancing.
-    It confirms that the API server is running and responsive.
-    
-    ## Monitoring Use Cases
-    
-    - **Load balancer health checks**: Verify service availability
-    - **Container orchestration**: Kubernetes/Docker health probes
-    - **Monitoring systems**: Service uptime verification
-    - **CI/CD pipelines**: Deployment verification
-    
-    ## Health Indicators
-    
-    - **API responsiveness**: Server is accepting requests
-    - **Basic functionality**: Core systems operational
-    - **Response time**: Service performance indicator
-    
-    ## Status Values
-    
-    - **healthy**: All systems operational
-    - **degraded**: Partial functionality (if implemented)
-    - **unhealthy**: Critical systems down (if implemented)
-    """,
+    description=load_doc("health"),
     response_description="System health status",
     responses={
         200: {
@@ -170,3 +123,18 @@ async def docs():
 async def health_check():
     """Check system health and availability"""
     return {"status": "healthy"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Production server settings: uvloop + httptools, no per-request access log
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=int(os.getenv("API_WORKERS", "1")),
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+    )
@@ -1,8 +1,21 @@
-from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, TypeAdapter
+from typing import Annotated, Optional, List, Dict, Any
 from enum import Enum
 
 
+# Only github.com repositories can be fetched, so validate with one anchored regex
+GITHUB_REPO_URL_PATTERN = r"^https://github\.com/[\w.-]+/[\w.-]+/?$"
+
+GitHubRepoUrl = Annotated[str, StringConstraints(pattern=GITHUB_REPO_URL_PATTERN)]
+
+
+# Response envelopes are built by our own code, so unknown fields are a bug
+RESPONSE_MODEL_CONFIG = ConfigDict(extra="forbid", frozen=True)
+
+# Analysis payloads may come from the LLM, so extra keys are dropped instead of rejected
+ANALYSIS_MODEL_CONFIG = ConfigDict(frozen=True)
+
+
 class TaskStatus(str, Enum):
     """Analysis task status values"""
     PENDING = "pending"
@@ -21,60 +34,72 @@ class IssueType(str, Enum):
 
 class AnalyzePRRequest(BaseModel):
     """Request to analyze a GitHub Pull Request"""
-    repo_url: HttpUrl = Field(
+    repo_url: GitHubRepoUrl = Field(
         ...,
         description="GitHub repository URL (e.g., https://github.com/owner/repo)",
-        example="https://github.com/sarim2000/code-review-agent"
+        examples=["https://github.com/sarim2000/code-review-agent"]
     )
     pr_number: int = Field(
         ...,
         description="Pull request number to analyze",
-        example=1,
+        examples=[1],
         gt=0
     )
     github_token: Optional[str] = Field(
         None,
         description="GitHub personal access token for authentication (recommended for private repos)",
-        example="ghp_xxxxxxxxxxxxxxxxxxxx"
+        examples=["ghp_xxxxxxxxxxxxxxxxxxxx"]
     )
 
 
 class Issue(BaseModel):
     """Individual code issue detected during analysis"""
+    model_config = ANALYSIS_MODEL_CONFIG
+
     type: IssueType = Field(..., description="Category of the issue")
-    line: int = Field(..., description="Line number where issue was found", example=15)
-    description: str = Field(..., description="Description of the issue", example="Line too long (120 characters)")
-    suggestion: str = Field(..., description="Suggested fix for the issue", example="Break line into multiple lines")
+    line: int = Field(..., description="Line number where issue was found", examples=[15])
+    description: str = Field(..., description="Description of the issue", examples=["Line too long (120 characters)"])
+    suggestion: str = Field(..., description="Suggested fix for the issue", examples=["Break line into multiple lines"])
 
 
 class FileAnalysis(BaseModel):
     """Analysis results for a single file"""
-    name: str = Field(..., description="File path and name", example="src/main.py")
+    model_config = ANALYSIS_MODEL_CONFIG
+
+    name: str = Field(..., description="File path and name", examples=["src/main.py"])
     issues: List[Issue] = Field(..., description="List of issues found in this file")
 
 
 class AnalysisSummary(BaseModel):
     """Summary statistics of the analysis"""
-    total_files: int = Field(..., description="Total number of files analyzed", example=5)
-    total_issues: int = Field(..., description="Total number of issues found", example=12)
-    critical_issues: int = Field(..., description="Number of critical/bug issues", example=2)
+    model_config = ANALYSIS_MODEL_CONFIG
+
+    total_files: int = Field(..., description="Total number of files analyzed", examples=[5])
+    total_issues: int = Field(..., description="Total number of issues found", examples=[12])
+    critical_issues: int = Field(..., description="Number of critical/bug issues", examples=[2])
 
 
 class AnalysisResult(BaseModel):
     """Complete analysis results"""
+    model_config = ANALYSIS_MODEL_CONFIG
+
     files: List[FileAnalysis] = Field(..., description="Analysis results for each file")
     summary: AnalysisSummary = Field(..., description="Summary statistics")
 
 
 class TaskStatusResponse(BaseModel):
     """Task status information"""
-    task_id: str = Field(..., description="Unique task identifier", example="abc123-def456-ghi789")
+    model_config = RESPONSE_MODEL_CONFIG
+
+    task_id: str = Field(..., description="Unique task identifier", examples=["abc123-def456-ghi789"])
     status: TaskStatus = Field(..., description="Current task status")
 
 
 class TaskResultResponse(BaseModel):
     """Task results with analysis data or error information"""
-    task_id: str = Field(..., description="Unique task identifier", example="abc123-def456-ghi789")
+    model_config = RESPONSE_MODEL_CONFIG
+
+    task_id: str = Field(..., description="Unique task identifier", examples=["abc123-def456-ghi789"])
     status: TaskStatus = Field(..., description="Final task status")
     results: Optional[AnalysisResult] = Field(None, description="Analysis results (if completed successfully)")
     error: Optional[str] = Field(None, description="Error message (if task failed)")
@@ -82,6 +107,13 @@ class TaskResultResponse(BaseModel):
 
 class TaskSubmissionResponse(BaseModel):
     """Response when submitting a new analysis task"""
-    task_id: str = Field(..., description="Unique task identifier for tracking", example="abc123-def456-ghi789")
+    model_config = RESPONSE_MODEL_CONFIG
+
+    task_id: str = Field(..., description="Unique task identifier for tracking", examples=["abc123-def456-ghi789"])
     status: TaskStatus = Field(..., description="Initial task status (always 'pending')")
-    message: str = Field(..., description="Confirmation message", example="Analysis task submitted successfully")
+    message: str = Field(..., description="Confirmation message", examples=["Analysis task submitted successfully"])
+
+
+# Prebuilt serializers for the hot polling endpoints, so responses go straight to JSON bytes
+TASK_STATUS_ADAPTER = TypeAdapter(TaskStatusResponse)
+TASK_RESULT_ADAPTER = TypeAdapter(TaskResultResponse)
@@ -1,9 +1,65 @@
 """Analysis service for code review"""
+import logging
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional
 from app.models.schemas import FileAnalysis, Issue, AnalysisResult, AnalysisSummary, IssueType
 from app.services.llm_service import LLMService
 
+logger = logging.getLogger(__name__)
+
+
+# Rule-based checks run over added ('+') lines of a patch: (pattern, issue type, description, suggestion)
+# Style checks
+_LONG_LINE_RULE = (
+    re.compile(r'^\+.{101,}', re.MULTILINE),
+    IssueType.STYLE,
+    "Line too long ({length} characters)",
+    "Break line into multiple lines or use shorter variable names"
+)
+_TRAILING_WHITESPACE_RULE = (
+    re.compile(r'^\+.*[^\S\n]$', re.MULTILINE),
+    IssueType.STYLE,
+    "Trailing whitespace",
+    "Remove trailing whitespace"
+)
+# Bug checks
+_PRINT_RULE = (
+    re.compile(r'^\+.*print\(', re.MULTILINE | re.IGNORECASE),
+    IssueType.BUG,
+    "Print statement found",
+    "Use proper logging instead of print statements"
+)
+_CONSOLE_LOG_RULE = (
+    re.compile(r'^\+.*console\.log\(', re.MULTILINE | re.IGNORECASE),
+    IssueType.BUG,
+    "Console.log statement found",
+    "Use proper logging instead of console.log"
+)
+# Performance checks
+_RANGE_LEN_RULE = (
+    re.compile(r'^\+(?=.*for)(?=.*in).*range\(len\(', re.MULTILINE),
+    IssueType.PERFORMANCE,
+    "Inefficient loop pattern",
+    "Use enumerate() instead of range(len())"
+)
+# Best practice checks
+_TODO_RULE = (
+    re.compile(r'^\+.*(?:TODO|FIXME)', re.MULTILINE | re.IGNORECASE),
+    IssueType.BEST_PRACTICE,
+    "TODO/FIXME comment found",
+    "Create a proper issue ticket for this task"
+)
+
+# File extension -> language of the language-specific rules
+_LANG = {'.py': 'py', '.js': 'js', '.ts': 'js', '.tsx': 'js', '.jsx': 'js'}
+
+# Rules applied per language, in the order issues are reported for a line
+_GENERIC_RULES = (_LONG_LINE_RULE, _TRAILING_WHITESPACE_RULE, _RANGE_LEN_RULE, _TODO_RULE)
+_PY_RULES = (_LONG_LINE_RULE, _TRAILING_WHITESPACE_RULE, _PRINT_RULE, _RANGE_LEN_RULE, _TODO_RULE)
+_JS_RULES = (_LONG_LINE_RULE, _TRAILING_WHITESPACE_RULE, _CONSOLE_LOG_RULE, _RANGE_LEN_RULE, _TODO_RULE)
+_RULES_BY_LANG = {None: _GENERIC_RULES, 'py': _PY_RULES, 'js': _JS_RULES}
+
 
 def analyze_code(pr_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -22,7 +78,7 @@ def analyze_code(pr_data: Dict[str, Any]) -> Dict[str, Any]:
             return llm_service.analyze_code_with_ai(pr_data)
         except Exception as e:
             # Fall back to rule-based analysis if AI fails
-            print(f"AI analysis failed, falling back to rule-based: {e}")
+            logger.warning(f"AI analysis failed, falling back to rule-based: {e}")
             return _analyze_code_rule_based(pr_data)
     else:
         # Use rule-based analysis if no AI key available
@@ -42,14 +98,15 @@ def _analyze_code_rule_based(pr_data: Dict[str, Any]) -> Dict[str, Any]:
     files_analysis = []
     total_issues = 0
     critical_issues = 0
+    bug = IssueType.BUG
     
     for file_data in pr_data["files"]:
         file_analysis = _analyze_file(file_data)
         files_analysis.append(file_analysis)
         
-        total_issues += len(file_analysis["issues"])
-        critical_issues += sum(1 for issue in file_analysis["issues"] 
-                              if issue["type"] == IssueType.BUG)
+        issues = file_analysis["issues"]
+        total_issues += len(issues)
+        critical_issues += sum(1 for issue in issues if issue["type"] is bug)
     
     summary = {
         "total_files": len(files_analysis),
@@ -75,6 +132,7 @@ def _analyze_file(file_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     filename = file_data["filename"]
     patch = file_data.get("patch", "")
+    lang = _LANG.get(os.path.splitext(filename)[1])
     
     issues = []
     
@@ -82,7 +140,7 @@ def _analyze_file(file_data: Dict[str, Any]) -> Dict[str, Any]:
     # In real implementation, this would use AI/ML models
     
     if patch:
-        issues.extend(_analyze_patch(patch, filename))
+        issues.extend(_analyze_patch(patch, lang))
     
     return {
         "name": filename,
@@ -90,100 +148,43 @@ def _analyze_file(file_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _analyze_patch(patch: str, filename: str) -> List[Dict[str, Any]]:
+def _analyze_patch(patch: str, lang: Optional[str]) -> List[Dict[str, Any]]:
     """
     Analyze a patch for potential issues
     
     Args:
         patch: Git patch content
-        filename: Name of the file
+        lang: Language of the file (see _LANG), or None for generic rules only
     
     Returns:
         List of issues found
     """
-    issues = []
-    
-    # Split patch into lines
-    lines = patch.split('\n')
+    rules = _RULES_BY_LANG[lang]
     
-    for line_num, line in enumerate(lines, 1):
-        # Skip context lines
-        if not line.startswith('+'):
-            continue
-            
-        # Remove the '+' prefix
-        code_line = line[1:] if line.startswith('+') else line
-        
-        # Simple rule-based checks
-        issues.extend(_check_line_issues(code_line, line_num, filename))
-    
-    return issues
-
-
-def _check_line_issues(line: str, line_num: int, filename: str) -> List[Dict[str, Any]]:
-    """
-    Check a single line for issues
+    # Scan the whole patch once per rule instead of splitting it into lines
+    matches = []
+    for rule_index, (pattern, _, _, _) in enumerate(rules):
+        for match in pattern.finditer(patch):
+            matches.append((match.start(), rule_index, match.end()))
     
-    Args:
-        line: Code line to check
-        line_num: Line number
-        filename: File name
+    # Order by position, then rule, to report issues line by line in rule order
+    matches.sort()
     
-    Returns:
-        List of issues found
-    """
     issues = []
+    line_num = 1
+    last_pos = 0
     
-    # Style checks
-    if len(line) > 100:
-        issues.append({
-            "type": IssueType.STYLE,
-            "line": line_num,
-            "description": f"Line too long ({len(line)} characters)",
-            "suggestion": "Break line into multiple lines or use shorter variable names"
-        })
-    
-    if line.rstrip() != line:
-        issues.append({
-            "type": IssueType.STYLE,
-            "line": line_num,
-            "description": "Trailing whitespace",
-            "suggestion": "Remove trailing whitespace"
-        })
-    
-    # Bug checks
-    if "print(" in line.lower() and filename.endswith('.py'):
-        issues.append({
-            "type": IssueType.BUG,
-            "line": line_num,
-            "description": "Print statement found",
-            "suggestion": "Use proper logging instead of print statements"
-        })
-    
-    if "console.log(" in line.lower() and (filename.endswith('.js') or filename.endswith('.ts')):
-        issues.append({
-            "type": IssueType.BUG,
-            "line": line_num,
-            "description": "Console.log statement found",
-            "suggestion": "Use proper logging instead of console.log"
-        })
-    
-    # Performance checks
-    if "for" in line and "in" in line and "range(len(" in line:
-        issues.append({
-            "type": IssueType.PERFORMANCE,
-            "line": line_num,
-            "description": "Inefficient loop pattern",
-            "suggestion": "Use enumerate() instead of range(len())"
-        })
-    
-    # Best practice checks
-    if "TODO" in line.upper() or "FIXME" in line.upper():
+    for start, rule_index, end in matches:
+        line_num += patch.count('\n', last_pos, start)
+        last_pos = start
+        
+        _, issue_type, description, suggestion = rules[rule_index]
         issues.append({
-            "type": IssueType.BEST_PRACTICE,
+            "type": issue_type,
             "line": line_num,
-            "description": "TODO/FIXME comment found",
-            "suggestion": "Create a proper issue ticket for this task"
+            # Matches for the long-line rule span the whole added line, minus its '+'
+            "description": description.format(length=end - start - 1),
+            "suggestion": suggestion
         })
     
-    return issues
\ No newline at end of file
+    return issues
@@ -1,9 +1,47 @@
 """GitHub service for fetching PR data"""
-from typing import Optional, Dict, Any, List
+import os
+import threading
+from typing import Optional, Dict, Any, Iterable, List
 from github import Github
-from github.Repository import Repository
-from github.PullRequest import PullRequest
+from github.File import File
 import re
+from app.core.cache import CACHE_DIR, FileCache
+
+
+# Matches https://github.com/owner/repo, git@github.com:owner/repo and github.com/owner/repo,
+# with an optional .git suffix or trailing slash
+_REPO_URL_RE = re.compile(
+    r'^(?:https://github\.com/|git@github\.com:|github\.com/)([^/]+)/([^/]+?)(?:\.git)?/?$'
+)
+
+# GitHub's maximum page size for list endpoints such as PR files
+GITHUB_PAGE_SIZE = 100
+
+# Per-request timeout
+GITHUB_TIMEOUT = 30  # seconds
+
+# Changed files are keyed by head commit, so an entry only goes stale when GitHub drops it
+PR_FILES_CACHE_TTL = 24 * 60 * 60  # 1 day
+
+_pr_files_cache = FileCache(os.path.join(CACHE_DIR, "github"))
+
+# PyGithub clients are not thread-safe: a request's verb, URL and headers sit on the shared
+# connection until its response is read. Thread-pool workers therefore keep one client per
+# token in each thread.
+_thread_clients = threading.local()
+
+
+def _github_client(github_token: Optional[str]) -> Github:
+    """Return this thread's GitHub client for the token, reusing its HTTP connection pool"""
+    clients = getattr(_thread_clients, "by_token", None)
+    if clients is None:
+        clients = _thread_clients.by_token = {}
+    
+    client = clients.get(github_token)
+    if client is None:
+        # Largest page size keeps file pagination to a minimum
+        client = clients[github_token] = Github(github_token, per_page=GITHUB_PAGE_SIZE, timeout=GITHUB_TIMEOUT)
+    return client
 
 
 def fetch_pr_data(repo_url: str, pr_number: int, github_token: Optional[str] = None) -> Dict[str, Any]:
@@ -21,66 +59,59 @@ def fetch_pr_data(repo_url: str, pr_number: int, github_token: Optional[str] = N
     # Extract owner and repo name from URL
     owner, repo_name = _extract_repo_info(repo_url)
     
-    # Initialize GitHub client
-    github_client = Github(github_token) if github_token else Github()
+    # Shared GitHub client, so repeated tasks skip the TCP/TLS handshake
+    github_client = _github_client(github_token)
     
-    try:
-        # Get repository and PR
-        repo = github_client.get_repo(f"{owner}/{repo_name}")
-        pr = repo.get_pull(pr_number)
-        
+    # Get repository and PR
+    repo = github_client.get_repo(f"{owner}/{repo_name}")
+    pr = repo.get_pull(pr_number)
+    
+    # Repeated submissions/retries for the same head commit reuse the cached files
+    cache_key = f"{owner}/{repo_name}#{pr_number}@{pr.head.sha}"
+    cached = _pr_files_cache.get(cache_key)
+    
+    if cached is not None:
+        files_data = cached["files"]
+    else:
         # Get PR files and their content
-        files_data = _get_pr_files(pr)
-        
-        # Get PR diff
-        diff_data = _get_pr_diff(pr)
-        
-        return {
-            "repo_url": repo_url,
-            "pr_number": pr_number,
-            "title": pr.title,
-            "description": pr.body,
-            "files": files_data,
-            "diff": diff_data,
-            "base_branch": pr.base.ref,
-            "head_branch": pr.head.ref,
-            "author": pr.user.login,
-            "created_at": pr.created_at.isoformat(),
-            "updated_at": pr.updated_at.isoformat()
-        }
+        files_data = _get_pr_files(pr.get_files())
         
-    finally:
-        github_client.close()
+        _pr_files_cache.set(cache_key, {"files": files_data}, PR_FILES_CACHE_TTL)
+    
+    # Get PR diff, rebuilt from the per-file patches so it is never cached twice
+    diff_data = _get_pr_diff(files_data)
+    
+    return {
+        "repo_url": repo_url,
+        "pr_number": pr_number,
+        "title": pr.title,
+        "description": pr.body,
+        "files": files_data,
+        "diff": diff_data,
+        "base_branch": pr.base.ref,
+        "head_branch": pr.head.ref,
+        "author": pr.user.login,
+        "created_at": pr.created_at.isoformat(),
+        "updated_at": pr.updated_at.isoformat()
+    }
+
 
 
 def _extract_repo_info(repo_url: str) -> tuple[str, str]:
     """Extract owner and repo name from GitHub URL"""
-    # Remove .git suffix if present
-    url = repo_url.rstrip('.git')
+    match = _REPO_URL_RE.match(repo_url)
+    if not match:
+        raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
     
-    # Match GitHub URL patterns - fixed to properly capture repo names
-    patterns = [
-        r'https://github\.com/([^/]+)/([^/]+?)/?$',
-        r'git@github\.com:([^/]+)/([^/]+)(?:\.git)?$',
-        r'github\.com/([^/]+)/([^/]+?)/?$'
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, url)
-        if match:
-            owner, repo = match.groups()
-            # Clean up repo name (remove any trailing characters that shouldn't be there)
-            repo = repo.rstrip('/')
-            return owner, repo
-    
-    raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
+    owner, repo = match.groups()
+    return owner, repo
 
 
-def _get_pr_files(pr: PullRequest) -> List[Dict[str, Any]]:
+def _get_pr_files(pr_files: Iterable[File]) -> List[Dict[str, Any]]:
     """Get list of files changed in the PR"""
     files = []
     
-    for file in pr.get_files():
+    for file in pr_files:
         files.append({
             "filename": file.filename,
             "status": file.status,  # added, modified, removed
@@ -95,19 +126,11 @@ def _get_pr_files(pr: PullRequest) -> List[Dict[str, Any]]:
     return files
 
 
-def _get_pr_diff(pr: PullRequest) -> str:
+def _get_pr_diff(files: List[Dict[str, Any]]) -> str:
     """Get the complete diff for the PR"""
-    # Get the diff using GitHub API
-    diff_url = pr.diff_url
-    
-    # For now, we'll use the patch from individual files
-    # In a real implementation, you might want to fetch the complete diff
-    diff_parts = []
-    
-    for file in pr.get_files():
-        if file.patch:
-            diff_parts.append(f"--- a/{file.filename}")
-            diff_parts.append(f"+++ b/{file.filename}")
-            diff_parts.append(file.patch)
-    
-    return "\n".join(diff_parts)
\ No newline at end of file
+    # Built from the already-fetched per-file patches, so it costs no extra GitHub request
+    return "\n".join(
+        f"--- a/{file['filename']}\n+++ b/{file['filename']}\n{file['patch']}"
+        for file in files
+        if file["patch"]
+    )
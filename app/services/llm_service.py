@@ -1,11 +1,94 @@
 """LLM service for AI-powered code analysis"""
+import functools
+import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any
 from openai import OpenAI
 from dotenv import load_dotenv
+from pydantic import TypeAdapter, ValidationError
+from app.core.cache import CACHE_DIR, FileCache
+from app.models.schemas import AnalysisResult, IssueType
 
 load_dotenv()
 
+# Issue types the AI may report; anything else is normalized to best_practice
+VALID_ISSUE_TYPES = frozenset(issue_type.value for issue_type in IssueType)
+
+# Parses and validates a well-formed AI response in a single pass
+ANALYSIS_RESULT_ADAPTER = TypeAdapter(AnalysisResult)
+
+# Model replies keyed by the chat request, so retries and re-submitted PRs skip the API call
+LLM_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+
+_llm_cache = FileCache(os.path.join(CACHE_DIR, "llm"))
+
+# Prompt pieces are prebuilt so a prompt is a header, one block per file and a fixed footer
+SYSTEM_PROMPT = (
+    "You are an expert code reviewer. Analyze the provided code changes and identify issues related to "
+    "style, bugs, performance, and best practices. Return your analysis in the specified JSON format."
+)
+
+MAX_PROMPT_FILES = 5  # stay within token limits
+MAX_PROMPT_PATCH_CHARS = 2000
+
+PROMPT_HEADER_TEMPLATE = (
+    "Analyze this GitHub Pull Request:\n"
+    "Title: {title}\n"
+    "Description: {description}\n"
+    "\n"
+    "Files changed ({analyzed} of {total}):\n"
+    "\n"
+)
+
+PROMPT_FILE_TEMPLATE = (
+    "File: {filename}\n"
+    "Status: {status}\n"
+    "Changes: +{additions} -{deletions}\n"
+    "Patch:\n"
+    "```diff\n"
+    "{patch}\n"
+    "```\n"
+    "\n"
+)
+
+PROMPT_FOOTER = """Please analyze the code changes and identify issues in these categories:
+1. Style issues (formatting, naming, etc.)
+2. Potential bugs or errors
+3. Performance improvements
+4. Best practices violations
+
+Return your analysis in this JSON format:
+{
+  "files": [
+    {
+      "name": "filename",
+      "issues": [
+        {
+          "type": "style|bug|performance|best_practice",
+          "line": line_number,
+          "description": "Issue description",
+          "suggestion": "How to fix it"
+        }
+      ]
+    }
+  ],
+  "summary": {
+    "total_files": number,
+    "total_issues": number,
+    "critical_issues": number
+  }
+}"""
+
+
+# Per-request timeout (the SDK's default is 10 minutes)
+OPENAI_TIMEOUT = 120  # seconds
+
+
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key: str) -> OpenAI:
+    """Return a per-process OpenAI client for the key, reusing its HTTP connection pool"""
+    return OpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT)
+
 
 class LLMService:
     """Service for interacting with Language Learning Models"""
@@ -17,7 +100,7 @@ class LLMService:
         # Initialize OpenAI client if API key is available
         openai_key = os.getenv("OPENAI_API_KEY")
         if openai_key:
-            self.client = OpenAI(api_key=openai_key)
+            self.client = _openai_client(openai_key)
     
     def analyze_code_with_ai(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -35,100 +118,93 @@ class LLMService:
         # Prepare the prompt
         prompt = self._build_analysis_prompt(pr_data)
         
+        request = self._build_chat_request(prompt)
+        
+        # Keyed on the whole request, so changing any model setting invalidates cached replies
+        cache_key = json.dumps(request, sort_keys=True)
+        cached_text = _llm_cache.get(cache_key)
+        if cached_text is not None:
+            return self._parse_ai_response(cached_text, pr_data)
+        
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert code reviewer. Analyze the provided code changes and identify issues related to style, bugs, performance, and best practices. Return your analysis in the specified JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=4000
-            )
+            response = self.client.chat.completions.create(**request)
             
             # Parse the response
-            analysis_text = response.choices[0].message.content
+            choice = response.choices[0]
+            analysis_text = choice.message.content
+            
+            # Truncated or filtered replies are not worth replaying
+            if choice.finish_reason == "stop":
+                _llm_cache.set(cache_key, analysis_text, LLM_CACHE_TTL)
+            
             return self._parse_ai_response(analysis_text, pr_data)
             
         except Exception as e:
             raise Exception(f"AI analysis failed: {str(e)}")
     
+    def _build_chat_request(self, prompt: str) -> Dict[str, Any]:
+        """Build the chat completion request body for an analysis prompt"""
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,
+            "max_tokens": 4000,
+            # JSON mode: the reply is the JSON object itself, with no surrounding prose
+            "response_format": {"type": "json_object"}
+        }
+    
     def _build_analysis_prompt(self, pr_data: Dict[str, Any]) -> str:
         """Build the analysis prompt for the AI"""
         
         # Get the first few files for analysis (to stay within token limits)
-        files_to_analyze = pr_data["files"][:5]  # Limit to 5 files
-        
-        prompt_parts = [
-            f"Analyze this GitHub Pull Request:",
-            f"Title: {pr_data['title']}",
-            f"Description: {pr_data.get('description', 'No description')}",
-            f"",
-            f"Files changed ({len(files_to_analyze)} of {len(pr_data['files'])}):",
-            ""
-        ]
+        files_to_analyze = pr_data["files"][:MAX_PROMPT_FILES]
         
-        for file_data in files_to_analyze:
-            prompt_parts.extend([
-                f"File: {file_data['filename']}",
-                f"Status: {file_data['status']}",
-                f"Changes: +{file_data['additions']} -{file_data['deletions']}",
-                f"Patch:",
-                f"```diff",
-                file_data.get('patch', '')[:2000],  # Limit patch size
-                f"```",
-                ""
-            ])
-        
-        prompt_parts.extend([
-            "Please analyze the code changes and identify issues in these categories:",
-            "1. Style issues (formatting, naming, etc.)",
-            "2. Potential bugs or errors",
-            "3. Performance improvements",
-            "4. Best practices violations",
-            "",
-            "Return your analysis in this JSON format:",
-            "{",
-            '  "files": [',
-            '    {',
-            '      "name": "filename",',
-            '      "issues": [',
-            '        {',
-            '          "type": "style|bug|performance|best_practice",',
-            '          "line": line_number,',
-            '          "description": "Issue description",',
-            '          "suggestion": "How to fix it"',
-            '        }',
-            '      ]',
-            '    }',
-            '  ],',
-            '  "summary": {',
-            '    "total_files": number,',
-            '    "total_issues": number,',
-            '    "critical_issues": number',
-            '  }',
-            "}"
-        ])
+        header = PROMPT_HEADER_TEMPLATE.format(
+            title=pr_data['title'],
+            description=pr_data.get('description', 'No description'),
+            analyzed=len(files_to_analyze),
+            total=len(pr_data['files'])
+        )
+        files = "".join(
+            PROMPT_FILE_TEMPLATE.format(
+                filename=file_data['filename'],
+                status=file_data['status'],
+                additions=file_data['additions'],
+                deletions=file_data['deletions'],
+                # Binary files have no patch
+                patch=(file_data.get('patch') or '')[:MAX_PROMPT_PATCH_CHARS]
+            )
+            for file_data in files_to_analyze
+        )
         
-        return "\n".join(prompt_parts)
+        return header + files + PROMPT_FOOTER
     
     def _parse_ai_response(self, response_text: str, pr_data: Dict[str, Any]) -> Dict[str, Any]:
         """Parse AI response and return structured data"""
+        # Fast path: a JSON-mode response that already matches the schema
+        try:
+            return ANALYSIS_RESULT_ADAPTER.validate_json(response_text).model_dump(mode="json")
+        except ValidationError:
+            pass
+        
         try:
-            import json
-            
             # Try to extract JSON from the response
             json_start = response_text.find('{')
             json_end = response_text.rfind('}') + 1
             
             if json_start >= 0 and json_end > json_start:
                 json_str = response_text[json_start:json_end]
+                
+                # Parse it loosely and repair what we can
                 analysis = json.loads(json_str)
                 
                 # Validate and clean the response
@@ -158,12 +234,11 @@ class LLMService:
             }
         
         # Validate issue types
-        valid_types = ["style", "bug", "performance", "best_practice"]
         for file_analysis in analysis["files"]:
             if "issues" in file_analysis:
                 for issue in file_analysis["issues"]:
-                    if issue.get("type") not in valid_types:
-                        issue["type"] = "best_practice"
+                    if issue.get("type") not in VALID_ISSUE_TYPES:
+                        issue["type"] = IssueType.BEST_PRACTICE.value
                     
                     # Ensure line number is valid
                     if not isinstance(issue.get("line"), int):
@@ -1,10 +1,46 @@
 """Task service for managing analysis tasks"""
 from typing import Optional, Tuple, Any
 from app.models.schemas import TaskStatus
+from app.core.cache import TTLCache
 from app.core.celery_app import celery_app
 from app.tasks.analysis_tasks import analyze_pr_task
 
 
+# Completed tasks never change state, so they can be cached far longer than any other status.
+# A failed task can still be redelivered and succeed, so it gets the short TTL like an active one.
+ACTIVE_TASK_CACHE_TTL = 0.5  # seconds
+COMPLETED_TASK_CACHE_TTL = 60  # seconds
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED)
+
+# Map Celery states to our TaskStatus enum
+_STATE_MAPPING = {
+    'PENDING': TaskStatus.PENDING,
+    'PROGRESS': TaskStatus.PROCESSING,
+    'SUCCESS': TaskStatus.COMPLETED,
+    'FAILURE': TaskStatus.FAILED,
+    'RETRY': TaskStatus.PROCESSING,
+    'REVOKED': TaskStatus.FAILED,
+}
+
+class TaskBackendError(Exception):
+    """Raised when the Celery result backend cannot be read"""
+
+
+_status_cache = TTLCache(maxsize=10_000)
+_result_cache = TTLCache(maxsize=10_000)
+
+
+def _cache_ttl(status: TaskStatus) -> float:
+    """Pick the cache lifetime for a task in the given status"""
+    return COMPLETED_TASK_CACHE_TTL if status is TaskStatus.COMPLETED else ACTIVE_TASK_CACHE_TTL
+
+
+def clear_task_cache() -> None:
+    """Forget all cached task lookups"""
+    _status_cache.clear()
+    _result_cache.clear()
+
+
 def submit_analysis_task(repo_url: str, pr_number: int, github_token: Optional[str] = None) -> str:
     """Submit a new analysis task and return task ID"""
     task = analyze_pr_task.delay(repo_url, pr_number, github_token)
@@ -12,24 +48,23 @@ def submit_analysis_task(repo_url: str, pr_number: int, github_token: Optional[s
 
 
 def get_task_status(task_id: str) -> Optional[TaskStatus]:
-    """Get the status of a task by ID"""
+    """Get the status of a task by ID
+    
+    Raises:
+        TaskBackendError: If the result backend cannot be read
+    """
+    cached = _status_cache.get(task_id)
+    if cached is not None:
+        return cached
+
     try:
         result = celery_app.AsyncResult(task_id)
-        
-        # Map Celery states to our TaskStatus enum
-        state_mapping = {
-            'PENDING': TaskStatus.PENDING,
-            'PROGRESS': TaskStatus.PROCESSING,
-            'SUCCESS': TaskStatus.COMPLETED,
-            'FAILURE': TaskStatus.FAILED,
-            'RETRY': TaskStatus.PROCESSING,
-            'REVOKED': TaskStatus.FAILED,
-        }
-        
-        return state_mapping.get(result.state, TaskStatus.PENDING)
-        
-    except Exception:
-        return None
+        status = _STATE_MAPPING.get(result.state, TaskStatus.PENDING)
+    except Exception as exc:
+        raise TaskBackendError(str(exc)) from exc
+
+    _status_cache.set(task_id, status, _cache_ttl(status))
+    return status
 
 
 def get_task_result(task_id: str) -> Tuple[Optional[TaskStatus], Optional[Any], Optional[str]]:
@@ -37,29 +72,31 @@ def get_task_result(task_id: str) -> Tuple[Optional[TaskStatus], Optional[Any],
     
     Returns:
         Tuple of (status, result, error_message)
+    
+    Raises:
+        TaskBackendError: If the result backend cannot be read
     """
+    cached = _result_cache.get(task_id)
+    if cached is not None:
+        return cached
+
     try:
         result = celery_app.AsyncResult(task_id)
         
-        # Map Celery states to our TaskStatus enum
-        state_mapping = {
-            'PENDING': TaskStatus.PENDING,
-            'PROGRESS': TaskStatus.PROCESSING,
-            'SUCCESS': TaskStatus.COMPLETED,
-            'FAILURE': TaskStatus.FAILED,
-            'RETRY': TaskStatus.PROCESSING,
-            'REVOKED': TaskStatus.FAILED,
-        }
+        # Celery only memoizes the backend read once a task is ready, so read state once
+        state = result.state
+        status = _STATE_MAPPING.get(state, TaskStatus.PENDING)
         
-        status = state_mapping.get(result.state, TaskStatus.PENDING)
-        
-        if result.state == 'SUCCESS':
-            return status, result.result, None
-        elif result.state == 'FAILURE':
+        if state == 'SUCCESS':
+            task_result = (status, result.result, None)
+        elif state == 'FAILURE':
             error_msg = str(result.result) if result.result else "Task failed"
-            return status, None, error_msg
+            task_result = (status, None, error_msg)
         else:
-            return status, None, None
+            task_result = (status, None, None)
             
-    except Exception:
-        return None, None, None
+    except Exception as exc:
+        raise TaskBackendError(str(exc)) from exc
+
+    _result_cache.set(task_id, task_result, _cache_ttl(status))
+    return task_result
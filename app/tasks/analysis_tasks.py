@@ -1,6 +1,7 @@
 """Celery tasks for code analysis"""
+import time
 from celery import current_task
-from celery.exceptions import Retry, WorkerLostError
+from celery.exceptions import Retry, SoftTimeLimitExceeded, WorkerLostError
 from app.core.celery_app import celery_app
 from app.services import github_service, analysis_service
 from typing import Optional
@@ -9,7 +10,40 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 2, 'countdown': 60})
+def _check_deadline(deadline: float) -> None:
+    """Stop the task once it is past its soft time limit"""
+    if time.monotonic() >= deadline:
+        raise SoftTimeLimitExceeded("Task exceeded its soft time limit")
+
+
+def _record_failure(exc: Exception, repo_url: str, pr_number: int) -> None:
+    """Mark the current task FAILED with the error details"""
+    error_msg = str(exc)
+    
+    try:
+        current_task.update_state(
+            state='FAILURE',
+            meta={
+                'error': error_msg,
+                'exc_type': type(exc).__name__,
+                'exc_message': error_msg,
+                'repo_url': repo_url,
+                'pr_number': pr_number
+            }
+        )
+    except Exception as state_exc:
+        logger.error(f"Failed to update task state: {state_exc}")
+
+
+# Acked only after completion, so a task lost with its worker is redelivered instead of dropped
+# Running out of time is final: a retry would start over with a fresh deadline
+@celery_app.task(
+    bind=True,
+    acks_late=True,
+    autoretry_for=(Exception,),
+    dont_autoretry_for=(SoftTimeLimitExceeded,),
+    retry_kwargs={'max_retries': 2, 'countdown': 60}
+)
 def analyze_pr_task(self, repo_url: str, pr_number: int, github_token: Optional[str] = None):
     """
     Analyze a GitHub PR asynchronously
@@ -22,6 +56,9 @@ def analyze_pr_task(self, repo_url: str, pr_number: int, github_token: Optional[
     Returns:
         Analysis results dictionary
     """
+    # See visibility_timeout in app/core/celery_app.py
+    deadline = time.monotonic() + celery_app.conf.task_soft_time_limit
+    
     try:
         # Update task state to processing
         current_task.update_state(
@@ -32,6 +69,8 @@ def analyze_pr_task(self, repo_url: str, pr_number: int, github_token: Optional[
         # Fetch PR data from GitHub
         pr_data = github_service.fetch_pr_data(repo_url, pr_number, github_token)
         
+        _check_deadline(deadline)
+        
         # Update task state
         current_task.update_state(
             state='PROGRESS',
@@ -43,32 +82,23 @@ def analyze_pr_task(self, repo_url: str, pr_number: int, github_token: Optional[
         
         return analysis_result
         
+    except SoftTimeLimitExceeded as exc:
+        logger.error(f"Task {self.request.id} timed out: {exc}")
+        _record_failure(exc, repo_url, pr_number)
+        raise
+        
     except Exception as exc:
         # Log the error for debugging
         logger.error(f"Task {self.request.id} failed: {exc}", exc_info=True)
         
-        # Update task state to failure with proper error info
-        error_msg = str(exc)
-        error_type = type(exc).__name__
-        
-        try:
-            current_task.update_state(
-                state='FAILURE',
-                meta={
-                    'error': error_msg,
-                    'exc_type': error_type,
-                    'exc_message': error_msg,
-                    'repo_url': repo_url,
-                    'pr_number': pr_number
-                }
-            )
-        except Exception as state_exc:
-            logger.error(f"Failed to update task state: {state_exc}")
-        
-        # Check if this is a retry attempt
+        # Check if this is a retry attempt; FAILURE is only recorded once no retries are left,
+        # so status polls never see a failure for a task that is about to run again
         if self.request.retries < self.max_retries:
             logger.info(f"Retrying task {self.request.id} (attempt {self.request.retries + 1})")
             raise self.retry(countdown=60, exc=exc)
         
+        # Update task state to failure with proper error info
+        _record_failure(exc, repo_url, pr_number)
+        
         # Final failure - re-raise as a simple Exception to avoid serialization issues
-        raise Exception(f"{error_type}: {error_msg}")
+        raise Exception(f"{type(exc).__name__}: {exc}")
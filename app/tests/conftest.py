@@ -0,0 +1,76 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.core.cache import FileCache
+from app.main import app
+from app.services import github_service, llm_service
+from app.services.llm_service import _openai_client
+
+
+class FakeOpenAI:
+    """Stand-in for openai.OpenAI whose chat.completions.create returns ``response`` or raises ``error``"""
+    
+    def __init__(self, api_key=None, timeout=None):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.response = None
+        self.error = None
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+    
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_openai():
+    """Install FakeOpenAI for the whole session so no test can reach the real API"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(llm_service, "OpenAI", FakeOpenAI)
+        yield FakeOpenAI
+
+
+@pytest.fixture(autouse=True)
+def file_caches(tmp_path, monkeypatch):
+    """Point the on-disk GitHub and LLM caches at per-test directories"""
+    monkeypatch.setattr(github_service, "_pr_files_cache", FileCache(str(tmp_path / "github")))
+    monkeypatch.setattr(llm_service, "_llm_cache", FileCache(str(tmp_path / "llm")))
+
+
+@pytest.fixture
+def openai_env(monkeypatch):
+    """Configure an OpenAI API key for the test"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+
+
+@pytest.fixture
+def no_openai_env(monkeypatch):
+    """Make sure no OpenAI API key is configured for the test"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+
+@pytest.fixture
+def openai_client(openai_env):
+    """Configure an OpenAI key and return the FakeOpenAI client LLMService will use"""
+    _openai_client.cache_clear()
+    yield _openai_client("test-key")
+    _openai_client.cache_clear()
+
+
+@pytest.fixture
+def async_result():
+    """Patch Celery result lookups; the returned mock's return_value is the task's result"""
+    task = SimpleNamespace(state='PENDING', result=None)
+    with patch('app.core.celery_app.celery_app.AsyncResult', return_value=task) as mock_async_result:
+        yield mock_async_result
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the session, so app startup and shutdown run once"""
+    with TestClient(app) as test_client:
+        yield test_client
@@ -1,126 +1,147 @@
+import logging
 import pytest
-from unittest.mock import Mock, patch
-from app.services.analysis_service import analyze_code, _analyze_code_rule_based
+from unittest.mock import patch
+from app.services.analysis_service import analyze_code, _analyze_code_rule_based, _analyze_file, _analyze_patch
 
 
-class TestAnalysisIntegration:
-    """Test analysis service with OpenAI integration"""
+class _StubLLM:
+    """Stand-in for LLMService that returns ``result`` or raises ``error``"""
+    result = None
+    error = None
+    calls = []
     
-    def test_analyze_code_with_openai_key(self):
-        """Test that analysis uses AI when OpenAI key is available"""
-        mock_ai_result = {
-            "files": [
-                {
-                    "name": "test.py",
-                    "issues": [
-                        {
-                            "type": "style",
-                            "line": 10,
-                            "description": "AI detected style issue",
-                            "suggestion": "AI suggestion"
-                        }
-                    ]
-                }
-            ],
-            "summary": {
-                "total_files": 1,
-                "total_issues": 1,
-                "critical_issues": 0
-            }
-        }
-        
-        pr_data = {
-            "title": "Test PR",
-            "files": [
+    def analyze_code_with_ai(self, pr_data):
+        self.calls.append(pr_data)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Replace LLMService with a fresh stub class for the test"""
+    stub = type("StubLLM", (_StubLLM,), {"calls": []})
+    monkeypatch.setattr('app.services.analysis_service.LLMService', stub)
+    return stub
+
+
+AI_RESULT = {
+    "files": [
+        {
+            "name": "test.py",
+            "issues": [
                 {
-                    "filename": "test.py",
-                    "status": "modified",
-                    "additions": 5,
-                    "deletions": 2,
-                    "patch": "mock patch"
+                    "type": "style",
+                    "line": 10,
+                    "description": "AI detected style issue",
+                    "suggestion": "AI suggestion"
                 }
             ]
         }
+    ],
+    "summary": {
+        "total_files": 1,
+        "total_issues": 1,
+        "critical_issues": 0
+    }
+}
+
+
+# One patch tripping the print, TODO and range(len()) rules
+MULTI_RULE_PR_DATA = {
+    "files": [
+        {
+            "filename": "test.py",
+            "status": "modified",
+            "additions": 3,
+            "deletions": 1,
+            "patch": "+print('debug')\n+# TODO: fix this\n+x = [i for i in range(len(items))]"
+        }
+    ]
+}
+
+# Ten files each tripping one rule (or none), checked in a single rule-based pass
+MANY_FILES_EXPECTED = [
+    ("print.py", "+print('debug')", ["Print statement found"]),
+    ("log.js", "+console.log('debug')", ["Console.log statement found"]),
+    ("print.js", "+print('not python')", []),
+    ("log.py", "+console.log('not js')", []),
+    ("todo.py", "+# TODO: fix this", ["TODO/FIXME comment found"]),
+    ("fixme.ts", "+// FIXME later", ["TODO/FIXME comment found"]),
+    ("loop.py", "+for i in range(len(items)):", ["Inefficient loop pattern"]),
+    ("long.md", "+" + "x" * 101, ["Line too long (101 characters)"]),
+    ("space.txt", "+x = 1 ", ["Trailing whitespace"]),
+    ("clean.py", "+x = 1\n-print('removed')\n context", []),
+]
+
+MANY_FILES_PR_DATA = {
+    "files": [
+        {"filename": filename, "status": "modified", "additions": 1, "deletions": 0, "patch": patch}
+        for filename, patch, _ in MANY_FILES_EXPECTED
+    ]
+}
+
+EMPTY_PATCH_PR_DATA = {
+    "files": [
+        {
+            "filename": "empty.py",
+            "status": "added",
+            "additions": 0,
+            "deletions": 0,
+            "patch": ""
+        }
+    ]
+}
+
+
+@pytest.fixture(scope="session")
+def pr_data():
+    """A single-file PR whose patch triggers the rule-based print check"""
+    return {
+        "title": "Test PR",
+        "files": [
+            {
+                "filename": "test.py",
+                "status": "modified",
+                "additions": 5,
+                "deletions": 2,
+                "patch": "+print('hello')"
+            }
+        ]
+    }
+
+
+class TestAnalysisIntegration:
+    """Test analysis service with OpenAI integration"""
+    
+    @pytest.mark.parametrize("env, ai_error, expect_ai", [
+        ({'OPENAI_API_KEY': 'test-key'}, None, True),
+        ({}, None, False),
+        ({'OPENAI_API_KEY': 'test-key'}, Exception("AI failed"), False),
+    ], ids=["openai_key", "no_openai_key", "ai_fallback"])
+    def test_analyze_code(self, stub_llm, caplog, pr_data, env, ai_error, expect_ai):
+        """Test analysis uses AI when a key is set and falls back to rule-based otherwise"""
+        stub_llm.result = AI_RESULT
+        stub_llm.error = ai_error
         
-        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
-            with patch('app.services.analysis_service.LLMService') as mock_llm:
-                mock_service = Mock()
-                mock_service.analyze_code_with_ai.return_value = mock_ai_result
-                mock_llm.return_value = mock_service
-                
+        with patch.dict('os.environ', env, clear=True):
+            with caplog.at_level(logging.WARNING, logger="app.services.analysis_service"):
                 result = analyze_code(pr_data)
-                
-                assert result == mock_ai_result
-                mock_service.analyze_code_with_ai.assert_called_once_with(pr_data)
-    
-    def test_analyze_code_without_openai_key(self):
-        """Test that analysis falls back to rule-based when no OpenAI key"""
-        pr_data = {
-            "title": "Test PR", 
-            "files": [
-                {
-                    "filename": "test.py",
-                    "status": "modified",
-                    "additions": 5,
-                    "deletions": 2,
-                    "patch": "+print('hello')"  # Should trigger rule-based detection
-                }
-            ]
-        }
         
-        with patch.dict('os.environ', {}, clear=True):
-            result = analyze_code(pr_data)
-            
-            # Should use rule-based analysis
+        if expect_ai:
+            assert result == AI_RESULT
+        else:
+            # Rule-based analysis should detect the print statement
             assert result["files"][0]["name"] == "test.py"
-            assert len(result["files"][0]["issues"]) > 0  # Should detect print statement
+            assert len(result["files"][0]["issues"]) > 0
             assert result["summary"]["total_files"] == 1
-    
-    def test_analyze_code_ai_fallback(self):
-        """Test that analysis falls back to rule-based when AI fails"""
-        pr_data = {
-            "title": "Test PR",
-            "files": [
-                {
-                    "filename": "test.py", 
-                    "status": "modified",
-                    "additions": 5,
-                    "deletions": 2,
-                    "patch": "+print('hello')"
-                }
-            ]
-        }
         
-        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
-            with patch('app.services.analysis_service.LLMService') as mock_llm:
-                mock_service = Mock()
-                mock_service.analyze_code_with_ai.side_effect = Exception("AI failed")
-                mock_llm.return_value = mock_service
-                
-                with patch('builtins.print') as mock_print:
-                    result = analyze_code(pr_data)
-                    
-                    # Should fall back to rule-based
-                    assert result["files"][0]["name"] == "test.py"
-                    assert len(result["files"][0]["issues"]) > 0
-                    mock_print.assert_called_once()
-                    assert "AI analysis failed" in mock_print.call_args[0][0]
+        assert stub_llm.calls == ([pr_data] if env else [])
+        assert ("AI analysis failed" in caplog.text) == (ai_error is not None)
     
     def test_rule_based_analysis_functionality(self):
         """Test that rule-based analysis works correctly"""
-        pr_data = {
-            "files": [
-                {
-                    "filename": "test.py",
-                    "status": "modified", 
-                    "additions": 3,
-                    "deletions": 1,
-                    "patch": "+print('debug')\n+# TODO: fix this\n+x = [i for i in range(len(items))]"
-                }
-            ]
-        }
-        
-        result = _analyze_code_rule_based(pr_data)
+        result = _analyze_code_rule_based(MULTI_RULE_PR_DATA)
         
         # Should detect multiple issues
         issues = result["files"][0]["issues"]
@@ -130,28 +151,67 @@ class TestAnalysisIntegration:
         assert "best_practice" in issue_types  # TODO comment
         assert "performance" in issue_types  # range(len()) pattern
         assert result["summary"]["total_issues"] >= 3
+        assert result["summary"]["critical_issues"] == 1  # only the print statement is a bug
     
+    def test_rule_based_analysis_many_files(self):
+        """Test one rule-based pass reports each file's own issues, in file order"""
+        result = _analyze_code_rule_based(MANY_FILES_PR_DATA)
+        
+        assert [
+            (file["name"], [issue["description"] for issue in file["issues"]])
+            for file in result["files"]
+        ] == [(filename, descriptions) for filename, _, descriptions in MANY_FILES_EXPECTED]
+        assert result["summary"] == {"total_files": 10, "total_issues": 7, "critical_issues": 2}
+    
+    @pytest.mark.usefixtures("no_openai_env")
     def test_analysis_service_maintains_compatibility(self):
         """Test that the updated service maintains API compatibility"""
-        pr_data = {
-            "files": [
-                {
-                    "filename": "empty.py",
-                    "status": "added",
-                    "additions": 0,
-                    "deletions": 0,
-                    "patch": ""
-                }
-            ]
-        }
+        result = analyze_code(EMPTY_PATCH_PR_DATA)
         
-        with patch.dict('os.environ', {}, clear=True):
-            result = analyze_code(pr_data)
-            
-            # Should return expected structure
-            assert "files" in result
-            assert "summary" in result
-            assert result["files"][0]["name"] == "empty.py"
-            assert result["files"][0]["issues"] == []
-            assert result["summary"]["total_files"] == 1
-            assert result["summary"]["total_issues"] == 0
\ No newline at end of file
+        # Should return expected structure
+        assert "files" in result
+        assert "summary" in result
+        assert result["files"][0]["name"] == "empty.py"
+        assert result["files"][0]["issues"] == []
+        assert result["summary"]["total_files"] == 1
+        assert result["summary"]["total_issues"] == 0
+
+
+class TestAnalyzePatch:
+    """Test the rule-based patch scanner"""
+    
+    def test_line_numbers_count_every_patch_line(self):
+        """Test issue line numbers include context and removed lines"""
+        patch = "@@ -1,2 +1,3 @@\n context\n-removed\n+print('x')"
+        
+        issues = _analyze_patch(patch, "py")
+        
+        assert [(issue["line"], issue["description"]) for issue in issues] == [
+            (4, "Print statement found")
+        ]
+    
+    def test_multiple_issues_on_one_line_keep_rule_order(self):
+        """Test every rule matching a line is reported, in rule order"""
+        patch = "+" + "x" * 101 + " # TODO \n+ok"
+        
+        issues = _analyze_patch(patch, "py")
+        
+        assert [issue["description"] for issue in issues] == [
+            "Line too long (109 characters)",
+            "Trailing whitespace",
+            "TODO/FIXME comment found"
+        ]
+        assert {issue["line"] for issue in issues} == {1}
+    
+    def test_language_specific_rules(self):
+        """Test print/console.log checks only apply to their languages"""
+        patch = "+print('x')\n+console.log('x')"
+        
+        def issue_lines(filename):
+            file_data = {"filename": filename, "patch": patch}
+            return [issue["line"] for issue in _analyze_file(file_data)["issues"]]
+        
+        assert issue_lines("app.py") == [1]
+        assert issue_lines("app.ts") == [2]
+        assert issue_lines("App.jsx") == [2]
+        assert issue_lines("README.md") == []
@@ -1,70 +1,89 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
 from app.main import app
+from app.api.responses import FastJSONResponse
 from app.models.schemas import TaskStatus
+from app.services import task_service
 
 
-client = TestClient(app)
+VALID_REQUEST = {
+    "repo_url": "https://github.com/test/repo",
+    "pr_number": 123
+}
+
+COMPLETED_RESULT = {
+    "files": [
+        {
+            "name": "test.py",
+            "issues": [
+                {
+                    "type": "style",
+                    "line": 10,
+                    "description": "Line too long",
+                    "suggestion": "Break into multiple lines"
+                }
+            ]
+        }
+    ],
+    "summary": {
+        "total_files": 1,
+        "total_issues": 1,
+        "critical_issues": 0
+    }
+}
 
 
 class TestAnalyzePREndpoint:
     """Test the POST /analyze-pr endpoint"""
     
-    def test_analyze_pr_valid_request(self):
+    def test_analyze_pr_valid_request(self, client, monkeypatch):
         """Test that valid PR analysis request returns task ID"""
-        request_data = {
-            "repo_url": "https://github.com/test/repo",
-            "pr_number": 123
-        }
+        monkeypatch.setattr(task_service, "submit_analysis_task", lambda *args: "test-task-id")
         
-        with patch('app.services.task_service.submit_analysis_task') as mock_submit:
-            mock_submit.return_value = "test-task-id"
-            
-            response = client.post("/analyze-pr", json=request_data)
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["task_id"] == "test-task-id"
-            assert data["status"] == TaskStatus.PENDING
-            assert "submitted" in data["message"].lower()
+        response = client.post("/analyze-pr", json=VALID_REQUEST)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["task_id"] == "test-task-id"
+        assert data["status"] == TaskStatus.PENDING
+        assert data["message"] == "Analysis task submitted successfully"
     
-    def test_analyze_pr_with_github_token(self):
+    def test_analyze_pr_with_github_token(self, client, monkeypatch):
         """Test PR analysis with GitHub token"""
-        request_data = {
-            "repo_url": "https://github.com/test/repo",
-            "pr_number": 123,
-            "github_token": "test-token"
-        }
+        request_data = {**VALID_REQUEST, "github_token": "test-token"}
+        
+        calls = []
+        
+        def submit(*args):
+            calls.append(args)
+            return "test-task-id"
+        
+        monkeypatch.setattr(task_service, "submit_analysis_task", submit)
+        
+        response = client.post("/analyze-pr", json=request_data)
         
-        with patch('app.services.task_service.submit_analysis_task') as mock_submit:
-            mock_submit.return_value = "test-task-id"
-            
-            response = client.post("/analyze-pr", json=request_data)
-            
-            assert response.status_code == 200
-            mock_submit.assert_called_once_with(
-                "https://github.com/test/repo", 
-                123, 
-                "test-token"
-            )
-    
-    def test_analyze_pr_invalid_url(self):
+        assert response.status_code == 200
+        assert calls == [("https://github.com/test/repo", 123, "test-token")]
+    
+    def test_analyze_pr_invalid_url(self, client):
         """Test PR analysis with invalid URL"""
-        request_data = {
-            "repo_url": "invalid-url",
-            "pr_number": 123
-        }
+        request_data = {**VALID_REQUEST, "repo_url": "invalid-url"}
+        
+        response = client.post("/analyze-pr", json=request_data)
+        
+        assert response.status_code == 422
+    
+    def test_analyze_pr_non_github_url(self, client):
+        """Test PR analysis rejects repositories outside github.com"""
+        request_data = {**VALID_REQUEST, "repo_url": "https://gitlab.com/test/repo"}
         
         response = client.post("/analyze-pr", json=request_data)
         
         assert response.status_code == 422
     
-    def test_analyze_pr_missing_fields(self):
+    def test_analyze_pr_missing_fields(self, client):
         """Test PR analysis with missing required fields"""
-        request_data = {
-            "repo_url": "https://github.com/test/repo"
-        }
+        request_data = {"repo_url": VALID_REQUEST["repo_url"]}
         
         response = client.post("/analyze-pr", json=request_data)
         
@@ -74,107 +93,148 @@ class TestAnalyzePREndpoint:
 class TestStatusEndpoint:
     """Test the GET /status/<task_id> endpoint"""
     
-    def test_get_status_pending(self):
-        """Test getting status of pending task"""
-        with patch('app.services.task_service.get_task_status') as mock_status:
-            mock_status.return_value = TaskStatus.PENDING
-            
-            response = client.get("/status/test-task-id")
-            
-            assert response.status_code == 200
+    @pytest.mark.parametrize("task_status, expected_code", [
+        (TaskStatus.PENDING, 200),
+        (TaskStatus.PROCESSING, 200),
+        (None, 404),
+    ], ids=["pending", "processing", "nonexistent"])
+    def test_get_status(self, client, monkeypatch, task_status, expected_code):
+        """Test the reported status, or 404 for an unknown task"""
+        monkeypatch.setattr(task_service, "get_task_status", lambda task_id: task_status)
+        
+        response = client.get("/status/test-task-id")
+        
+        assert response.status_code == expected_code
+        if task_status is not None:
             data = response.json()
             assert data["task_id"] == "test-task-id"
-            assert data["status"] == TaskStatus.PENDING
-    
-    def test_get_status_processing(self):
-        """Test getting status of processing task"""
-        with patch('app.services.task_service.get_task_status') as mock_status:
-            mock_status.return_value = TaskStatus.PROCESSING
-            
-            response = client.get("/status/test-task-id")
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == TaskStatus.PROCESSING
-    
-    def test_get_status_nonexistent_task(self):
-        """Test getting status of non-existent task"""
-        with patch('app.services.task_service.get_task_status') as mock_status:
-            mock_status.return_value = None
-            
-            response = client.get("/status/nonexistent-task")
-            
-            assert response.status_code == 404
+            assert data["status"] == task_status
+    
+    def test_get_status_if_none_match(self, client, monkeypatch):
+        """Test polling with the last ETag returns 304 until the status changes"""
+        statuses = iter([TaskStatus.PROCESSING, TaskStatus.PROCESSING, TaskStatus.COMPLETED])
+        monkeypatch.setattr(task_service, "get_task_status", lambda task_id: next(statuses))
+        
+        first = client.get("/status/test-task-id")
+        etag = first.headers["etag"]
+        unchanged = client.get("/status/test-task-id", headers={"If-None-Match": etag})
+        changed = client.get("/status/test-task-id", headers={"If-None-Match": etag})
+        
+        assert etag == '"test-task-id-processing"'
+        assert first.headers["cache-control"] == "no-cache"
+        assert (unchanged.status_code, unchanged.content) == (304, b"")
+        assert changed.status_code == 200
+        assert changed.json()["status"] == TaskStatus.COMPLETED
+    
+    @pytest.mark.parametrize("path, service_function", [
+        ("/status/test-task-id", "get_task_status"),
+        ("/results/test-task-id", "get_task_result"),
+    ], ids=["status", "results"])
+    def test_backend_error_returns_service_unavailable(self, client, monkeypatch, path, service_function):
+        """Test a result backend failure is a 503, not a 404"""
+        def unavailable(task_id):
+            raise task_service.TaskBackendError("Too many connections")
+        monkeypatch.setattr(task_service, service_function, unavailable)
+        
+        response = client.get(path)
+        
+        assert response.status_code == 503
+        assert response.json() == {"detail": "Task backend unavailable"}
 
 
 class TestResultsEndpoint:
     """Test the GET /results/<task_id> endpoint"""
     
-    def test_get_results_completed(self):
-        """Test getting results of completed task"""
-        mock_result = {
-            "files": [
-                {
-                    "name": "test.py",
-                    "issues": [
-                        {
-                            "type": "style",
-                            "line": 10,
-                            "description": "Line too long",
-                            "suggestion": "Break into multiple lines"
-                        }
-                    ]
-                }
-            ],
-            "summary": {
-                "total_files": 1,
-                "total_issues": 1,
-                "critical_issues": 0
-            }
-        }
+    @pytest.mark.parametrize("task_result, expected_code", [
+        ((TaskStatus.COMPLETED, COMPLETED_RESULT, None), 200),
+        ((TaskStatus.FAILED, None, "Analysis failed"), 200),
+        ((TaskStatus.PENDING, None, None), 200),
+        ((None, None, None), 404),
+    ], ids=["completed", "failed", "pending", "nonexistent"])
+    def test_get_results(self, client, monkeypatch, task_result, expected_code):
+        """Test results, errors and status are reported, or 404 for an unknown task"""
+        monkeypatch.setattr(task_service, "get_task_result", lambda task_id: task_result)
+        
+        response = client.get("/results/test-task-id")
         
-        with patch('app.services.task_service.get_task_result') as mock_get_result:
-            mock_get_result.return_value = (TaskStatus.COMPLETED, mock_result, None)
-            
-            response = client.get("/results/test-task-id")
-            
-            assert response.status_code == 200
+        assert response.status_code == expected_code
+        status, results, error = task_result
+        if status is not None:
             data = response.json()
             assert data["task_id"] == "test-task-id"
-            assert data["status"] == TaskStatus.COMPLETED
-            assert data["results"] is not None
-            assert data["error"] is None
-    
-    def test_get_results_failed(self):
-        """Test getting results of failed task"""
-        with patch('app.services.task_service.get_task_result') as mock_get_result:
-            mock_get_result.return_value = (TaskStatus.FAILED, None, "Analysis failed")
-            
-            response = client.get("/results/test-task-id")
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == TaskStatus.FAILED
-            assert data["results"] is None
-            assert data["error"] == "Analysis failed"
-    
-    def test_get_results_pending(self):
-        """Test getting results of pending task"""
-        with patch('app.services.task_service.get_task_result') as mock_get_result:
-            mock_get_result.return_value = (TaskStatus.PENDING, None, None)
-            
-            response = client.get("/results/test-task-id")
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == TaskStatus.PENDING
-            assert data["results"] is None
-    
-    def test_get_results_nonexistent_task(self):
-        """Test getting results of non-existent task"""
-        with patch('app.services.task_service.get_task_result') as mock_get_result:
-            mock_get_result.return_value = (None, None, None)
-            
-            response = client.get("/results/nonexistent-task")
-            
-            assert response.status_code == 404
\ No newline at end of file
+            assert data["status"] == status
+            assert data["results"] == results
+            assert data["error"] == error
+    
+    @pytest.mark.parametrize("task_result, cache_control", [
+        ((TaskStatus.COMPLETED, COMPLETED_RESULT, None), "public, max-age=3600, immutable"),
+        ((TaskStatus.FAILED, None, "Analysis failed"), "no-cache"),
+    ], ids=["completed", "failed"])
+    def test_get_results_finished_sets_cache_headers(self, client, monkeypatch, task_result, cache_control):
+        """Test finished results carry an ETag, and only completed ones are cached long-term"""
+        monkeypatch.setattr(task_service, "get_task_result", lambda task_id: task_result)
+        
+        response = client.get("/results/test-task-id")
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"test-task-id-{task_result[0].value}"'
+        assert response.headers["cache-control"] == cache_control
+    
+    def test_get_results_if_none_match_returns_not_modified(self, client, monkeypatch):
+        """Test a matching If-None-Match on a finished task returns 304"""
+        monkeypatch.setattr(task_service, "get_task_result", lambda task_id: (TaskStatus.FAILED, None, "Analysis failed"))
+        
+        response = client.get(
+            "/results/test-task-id",
+            headers={"If-None-Match": '"test-task-id-failed"'}
+        )
+        
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    def test_get_results_pending_not_cacheable(self, client, monkeypatch):
+        """Test unfinished results carry no ETag"""
+        monkeypatch.setattr(task_service, "get_task_result", lambda task_id: (TaskStatus.PENDING, None, None))
+        
+        response = client.get(
+            "/results/test-task-id",
+            headers={"If-None-Match": '"test-task-id-pending"'}
+        )
+        
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+class TestRouteRegistration:
+    """Test the application route table"""
+    
+    def test_no_route_registered_twice(self):
+        """Test every method/path pair is registered exactly once"""
+        registered = [
+            (method, route.path)
+            for route in app.routes
+            for method in getattr(route, "methods", None) or ()
+        ]
+        
+        assert len(registered) == len(set(registered))
+    
+    def test_task_routes_registered(self):
+        """Test the task endpoints are all mounted on the app"""
+        paths = {route.path for route in app.routes}
+        
+        assert {"/analyze-pr", "/status/{task_id}", "/results/{task_id}"} <= paths
+    
+    def test_routes_default_to_fast_json_response(self):
+        """Test API routes render JSON with the pydantic-core serializer"""
+        route = next(route for route in app.routes if route.path == "/analyze-pr")
+        
+        assert route.response_class is FastJSONResponse
+    
+    def test_openapi_schema_built_at_startup(self):
+        """Test the OpenAPI schema is generated once when the app starts"""
+        app.openapi_schema = None
+        
+        with TestClient(app):
+            schema = app.openapi_schema
+            assert schema is not None
+            assert app.openapi() is schema
@@ -0,0 +1,123 @@
+from unittest.mock import patch
+from app.core.cache import FileCache, TTLCache
+
+
+class TestTTLCache:
+    """Test the in-process TTL cache"""
+    
+    def test_get_returns_value_within_ttl(self):
+        """Test values are returned until they expire"""
+        cache = TTLCache()
+        cache.set("key", "value", ttl=60)
+        
+        assert cache.get("key") == "value"
+    
+    def test_get_drops_expired_value(self):
+        """Test expired values are treated as missing"""
+        cache = TTLCache()
+        
+        with patch('app.core.cache.time.monotonic', return_value=100.0):
+            cache.set("key", "value", ttl=1)
+        with patch('app.core.cache.time.monotonic', return_value=101.0):
+            assert cache.get("key") is None
+    
+    def test_invalidate_and_clear(self):
+        """Test entries can be dropped individually or all at once"""
+        cache = TTLCache()
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        
+        cache.clear()
+        assert cache.get("b") is None
+    
+    def test_maxsize_evicts_oldest_entry(self):
+        """Test the cache never grows past maxsize"""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.set("c", 3, ttl=60)
+        
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("c") == 3
+
+
+class TestFileCache:
+    """Test the on-disk TTL cache"""
+    
+    def test_round_trip(self, tmp_path):
+        """Test stored values are read back, including from another instance"""
+        FileCache(str(tmp_path)).set("key", {"files": [1, 2]}, ttl=60)
+        
+        assert FileCache(str(tmp_path)).get("key") == {"files": [1, 2]}
+    
+    def test_missing_key(self, tmp_path):
+        """Test a missing entry is a miss"""
+        assert FileCache(str(tmp_path)).get("missing") is None
+    
+    def test_expired_entry_is_removed(self, tmp_path):
+        """Test expired entries are treated as missing and deleted"""
+        cache = FileCache(str(tmp_path))
+        
+        with patch('app.core.cache.time.time', return_value=100.0):
+            cache.set("key", "value", ttl=1)
+        with patch('app.core.cache.time.time', return_value=101.0):
+            assert cache.get("key") is None
+        
+        assert list(tmp_path.glob("*.json")) == []
+    
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """Test unreadable entries do not raise"""
+        cache = FileCache(str(tmp_path))
+        cache.set("key", "value", ttl=60)
+        next(tmp_path.glob("*.json")).write_text("{not json")
+        
+        assert cache.get("key") is None
+    
+    def test_unserializable_value_is_not_raised(self, tmp_path):
+        """Test write failures are swallowed and leave no temp files"""
+        cache = FileCache(str(tmp_path))
+        cache.set("key", object(), ttl=60)
+        
+        assert cache.get("key") is None
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_expiry_is_stored_as_mtime(self, tmp_path):
+        """Test prune decides expiry from file mtimes alone"""
+        cache = FileCache(str(tmp_path))
+        
+        with patch('app.core.cache.time.time', return_value=100.0):
+            cache.set("key", "value", ttl=5)
+        
+        assert next(tmp_path.glob("*.json")).stat().st_mtime == 105.0
+    
+    def test_clear(self, tmp_path):
+        """Test clear removes every entry"""
+        cache = FileCache(str(tmp_path))
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        
+        cache.clear()
+        
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+    
+    def test_writes_prune_expired_entries(self, tmp_path):
+        """Test writes sweep expired entries in the background even if their key is never read again"""
+        cache = FileCache(str(tmp_path), prune_every=2)
+        
+        with patch('app.core.cache.time.time', return_value=100.0):
+            cache.set("old", "value", ttl=1)
+            cache._prune_thread.join()
+            cache.set("live", "value", ttl=60)
+        with patch('app.core.cache.time.time', return_value=101.0):
+            cache.set("new", "value", ttl=60)
+            cache._prune_thread.join()
+            
+            assert len(list(tmp_path.glob("*.json"))) == 2
+            assert cache.get("live") == "value"
+            assert cache.get("new") == "value"
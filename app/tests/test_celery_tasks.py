@@ -1,127 +1,214 @@
 import pytest
-from unittest.mock import Mock, patch
-from app.core.celery_app import celery_app
+from types import SimpleNamespace
+from unittest.mock import Mock, PropertyMock, patch
+from celery.backends.cache import CacheBackend
+from celery.exceptions import SoftTimeLimitExceeded
+from app.core.celery_app import IO_QUEUE, celery_app
 from app.models.schemas import TaskStatus, IssueType
+from app.services import task_service
+from app.services.task_service import get_task_result, get_task_status, submit_analysis_task
+from app.tasks.analysis_tasks import analyze_pr_task
 
 
-class TestCeleryTasks:
-    """Test Celery task functionality"""
-    
-    def test_analyze_pr_task_success(self):
-        """Test successful PR analysis task"""
-        from app.tasks.analysis_tasks import analyze_pr_task
-        
-        mock_analysis_result = {
-            "files": [
+@pytest.fixture(autouse=True)
+def clear_task_cache():
+    """Keep cached task lookups from leaking between tests"""
+    task_service.clear_task_cache()
+    yield
+    task_service.clear_task_cache()
+
+
+@pytest.fixture
+def memory_result_backend(monkeypatch):
+    """Keep the task's update_state writes in memory, so eager runs need no Redis"""
+    monkeypatch.setattr(analyze_pr_task, "backend", CacheBackend(app=celery_app, url="memory://"))
+
+
+ANALYSIS_RESULT = {
+    "files": [
+        {
+            "name": "test.py",
+            "issues": [
                 {
-                    "name": "test.py",
-                    "issues": [
-                        {
-                            "type": IssueType.STYLE,
-                            "line": 10,
-                            "description": "Line too long",
-                            "suggestion": "Break into multiple lines"
-                        }
-                    ]
+                    "type": IssueType.STYLE,
+                    "line": 10,
+                    "description": "Line too long",
+                    "suggestion": "Break into multiple lines"
                 }
-            ],
-            "summary": {
-                "total_files": 1,
-                "total_issues": 1,
-                "critical_issues": 0
-            }
+            ]
         }
-        
-        with patch('app.services.github_service.fetch_pr_data') as mock_fetch:
-            with patch('app.services.analysis_service.analyze_code') as mock_analyze:
-                mock_fetch.return_value = {"files": ["test.py"], "diff": "mock diff"}
-                mock_analyze.return_value = mock_analysis_result
-                
-                result = analyze_pr_task.apply(
-                    args=["https://github.com/test/repo", 123, None]
-                )
-                
-                assert result.status == 'SUCCESS'
-                assert result.result == mock_analysis_result
+    ],
+    "summary": {
+        "total_files": 1,
+        "total_issues": 1,
+        "critical_issues": 0
+    }
+}
+
+
+@pytest.mark.usefixtures("memory_result_backend")
+class TestCeleryTasks:
+    """Test Celery task functionality"""
     
-    def test_analyze_pr_task_github_error(self):
-        """Test PR analysis task with GitHub fetch error"""
-        from app.tasks.analysis_tasks import analyze_pr_task
+    @pytest.mark.slow
+    @pytest.mark.parametrize("fetch_error, analyze_error, expected_status", [
+        (None, None, 'SUCCESS'),
+        (Exception("GitHub API error"), None, 'FAILURE'),
+        (None, Exception("Analysis failed"), 'FAILURE'),
+    ], ids=["success", "github_error", "analysis_error"])
+    def test_analyze_pr_task(self, fetch_error, analyze_error, expected_status):
+        """Test the PR analysis task result for success and each failing step"""
+        github = Mock(**{
+            "fetch_pr_data.return_value": {"files": ["test.py"], "diff": "mock diff"},
+            "fetch_pr_data.side_effect": fetch_error
+        })
+        analysis = Mock(**{
+            "analyze_code.return_value": ANALYSIS_RESULT,
+            "analyze_code.side_effect": analyze_error
+        })
         
-        with patch('app.services.github_service.fetch_pr_data') as mock_fetch:
-            mock_fetch.side_effect = Exception("GitHub API error")
-            
+        with patch.multiple('app.tasks.analysis_tasks', github_service=github, analysis_service=analysis):
             result = analyze_pr_task.apply(
                 args=["https://github.com/test/repo", 123, None]
             )
-            
-            assert result.status == 'FAILURE'
-            assert "GitHub API error" in str(result.result)
+        
+        assert result.status == expected_status
+        if expected_status == 'SUCCESS':
+            assert result.result == ANALYSIS_RESULT
+        else:
+            assert str(fetch_error or analyze_error) in str(result.result)
+    
+    @pytest.mark.slow
+    def test_analyze_pr_task_records_failure_only_when_retries_run_out(self, monkeypatch):
+        """Test a failing attempt that will be retried never reports FAILURE"""
+        states = []
+        monkeypatch.setattr(analyze_pr_task, "update_state", lambda **kwargs: states.append(kwargs["state"]))
+        github = Mock(**{"fetch_pr_data.side_effect": Exception("GitHub API error")})
+        
+        with patch.multiple('app.tasks.analysis_tasks', github_service=github, analysis_service=Mock()):
+            result = analyze_pr_task.apply(args=["https://github.com/test/repo", 123, None])
+        
+        assert result.status == 'FAILURE'
+        assert states.count('FAILURE') == 1
+        assert states[-1] == 'FAILURE'
     
-    def test_analyze_pr_task_analysis_error(self):
-        """Test PR analysis task with analysis error"""
-        from app.tasks.analysis_tasks import analyze_pr_task
-        
-        with patch('app.services.github_service.fetch_pr_data') as mock_fetch:
-            with patch('app.services.analysis_service.analyze_code') as mock_analyze:
-                mock_fetch.return_value = {"files": ["test.py"], "diff": "mock diff"}
-                mock_analyze.side_effect = Exception("Analysis failed")
-                
-                result = analyze_pr_task.apply(
-                    args=["https://github.com/test/repo", 123, None]
-                )
-                
-                assert result.status == 'FAILURE'
-                assert "Analysis failed" in str(result.result)
+    def test_analyze_pr_task_routing(self):
+        """Test PR analysis is acked late and routed to the I/O queue"""
+        route = celery_app.amqp.router.route({}, analyze_pr_task.name)
+        
+        assert analyze_pr_task.acks_late is True
+        assert route["queue"].name == IO_QUEUE
+    
+    @pytest.mark.slow
+    def test_analyze_pr_task_stops_at_soft_time_limit(self, monkeypatch):
+        """Test the task enforces its own soft time limit, which the thread pool does not"""
+        states = []
+        monkeypatch.setattr(analyze_pr_task, "update_state", lambda **kwargs: states.append(kwargs["state"]))
+        monkeypatch.setattr(celery_app.conf, "task_soft_time_limit", 0)
+        github = Mock()
+        analysis = Mock()
+        
+        with patch.multiple('app.tasks.analysis_tasks', github_service=github, analysis_service=analysis):
+            result = analyze_pr_task.apply(args=["https://github.com/test/repo", 123, None])
+        
+        assert result.status == 'FAILURE'
+        assert isinstance(result.result, SoftTimeLimitExceeded)
+        # Timing out is final: no retry re-runs the fetch with a fresh deadline
+        assert github.fetch_pr_data.call_count == 1
+        assert states == ['PROGRESS', 'FAILURE']
+        analysis.analyze_code.assert_not_called()
 
 
 class TestTaskService:
     """Test task service with Celery integration"""
     
-    def test_submit_analysis_task_integration(self):
+    def test_submit_analysis_task_integration(self, monkeypatch):
         """Test task submission returns valid task ID"""
-        from app.services.task_service import submit_analysis_task
-        
-        with patch('app.tasks.analysis_tasks.analyze_pr_task.delay') as mock_delay:
-            mock_task = Mock()
-            mock_task.id = "test-task-id"
-            mock_delay.return_value = mock_task
-            
-            task_id = submit_analysis_task(
-                "https://github.com/test/repo", 123, "token"
-            )
-            
-            assert task_id == "test-task-id"
-            mock_delay.assert_called_once_with(
-                "https://github.com/test/repo", 123, "token"
-            )
+        calls = []
+        
+        def delay(*args, **kwargs):
+            calls.append((args, kwargs))
+            return SimpleNamespace(id="test-task-id")
+        
+        monkeypatch.setattr(analyze_pr_task, "delay", delay)
+        
+        task_id = submit_analysis_task(
+            "https://github.com/test/repo", 123, "token"
+        )
+        
+        assert task_id == "test-task-id"
+        assert calls == [(("https://github.com/test/repo", 123, "token"), {})]
     
-    def test_get_task_status_integration(self):
+    def test_get_task_status_integration(self, async_result):
         """Test getting task status from Celery"""
-        from app.services.task_service import get_task_status
-        
-        with patch('app.core.celery_app.celery_app.AsyncResult') as mock_result:
-            mock_task = Mock()
-            mock_task.state = 'PENDING'
-            mock_result.return_value = mock_task
-            
-            status = get_task_status("test-task-id")
-            
-            assert status == TaskStatus.PENDING
-            mock_result.assert_called_once_with("test-task-id")
+        async_result.return_value.state = 'PENDING'
+        
+        status = get_task_status("test-task-id")
+        
+        assert status == TaskStatus.PENDING
+        async_result.assert_called_once_with("test-task-id")
     
-    def test_get_task_result_integration(self):
+    def test_get_task_result_integration(self, async_result):
         """Test getting task result from Celery"""
-        from app.services.task_service import get_task_result
-        
-        with patch('app.core.celery_app.celery_app.AsyncResult') as mock_result:
-            mock_task = Mock()
-            mock_task.state = 'SUCCESS'
-            mock_task.result = {"test": "result"}
-            mock_result.return_value = mock_task
-            
-            status, result, error = get_task_result("test-task-id")
-            
-            assert status == TaskStatus.COMPLETED
-            assert result == {"test": "result"}
-            assert error is None
\ No newline at end of file
+        async_result.return_value.state = 'SUCCESS'
+        async_result.return_value.result = {"test": "result"}
+        
+        status, result, error = get_task_result("test-task-id")
+        
+        assert status == TaskStatus.COMPLETED
+        assert result == {"test": "result"}
+        assert error is None
+    
+    def test_get_task_status_is_cached(self, async_result):
+        """Test repeated status polls within the TTL hit the backend once"""
+        async_result.return_value.state = 'PROGRESS'
+        
+        assert get_task_status("test-task-id") == TaskStatus.PROCESSING
+        assert get_task_status("test-task-id") == TaskStatus.PROCESSING
+        
+        async_result.assert_called_once_with("test-task-id")
+    
+    def test_get_task_result_active_cache_expires(self, async_result):
+        """Test active task results are only cached briefly"""
+        async_result.return_value.state = 'PENDING'
+        
+        with patch('app.services.task_service.ACTIVE_TASK_CACHE_TTL', 0):
+            get_task_result("test-task-id")
+            get_task_result("test-task-id")
+        
+        assert async_result.call_count == 2
+    
+    def test_get_task_status_failed_cache_expires(self, async_result):
+        """Test failed tasks get the short TTL, since a redelivered task can still succeed"""
+        async_result.return_value.state = 'FAILURE'
+        
+        with patch('app.services.task_service.ACTIVE_TASK_CACHE_TTL', 0):
+            assert get_task_status("test-task-id") == TaskStatus.FAILED
+            assert get_task_status("test-task-id") == TaskStatus.FAILED
+        
+        assert async_result.call_count == 2
+    
+    def test_get_task_result_failure_not_cached(self, async_result):
+        """Test backend errors are raised and not cached"""
+        async_result.side_effect = Exception("Redis down")
+        
+        for _ in range(2):
+            with pytest.raises(task_service.TaskBackendError, match="Redis down"):
+                get_task_result("test-task-id")
+        assert async_result.call_count == 2
+    
+    def test_get_task_status_backend_error_raises(self, async_result):
+        """Test a backend error is not reported as an unknown task"""
+        async_result.side_effect = ConnectionError("Too many connections")
+        
+        with pytest.raises(task_service.TaskBackendError):
+            get_task_status("test-task-id")
+    
+    def test_get_task_result_reads_backend_once(self, async_result):
+        """Test an unfinished task's state is fetched from the backend only once"""
+        async_result.return_value = Mock()
+        state = PropertyMock(return_value='PROGRESS')
+        type(async_result.return_value).state = state
+        
+        assert get_task_result("test-task-id") == (TaskStatus.PROCESSING, None, None)
+        state.assert_called_once()
@@ -0,0 +1,155 @@
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import Mock, patch
+from app.services import github_service
+from app.services.github_service import _extract_repo_info, fetch_pr_data
+
+
+class TestExtractRepoInfo:
+    """Test GitHub repository URL parsing"""
+    
+    @pytest.mark.parametrize("repo_url", [
+        "https://github.com/owner/repo",
+        "https://github.com/owner/repo/",
+        "https://github.com/owner/repo.git",
+        "git@github.com:owner/repo.git",
+        "git@github.com:owner/repo",
+        "github.com/owner/repo",
+    ])
+    def test_supported_url_formats(self, repo_url):
+        """Test every supported URL format yields owner and repo"""
+        assert _extract_repo_info(repo_url) == ("owner", "repo")
+    
+    def test_repo_name_ending_in_git_characters(self):
+        """Test repo names ending in '.', 'g', 'i' or 't' are kept intact"""
+        assert _extract_repo_info("https://github.com/owner/digit") == ("owner", "digit")
+        assert _extract_repo_info("https://github.com/owner/my.git.tools") == ("owner", "my.git.tools")
+    
+    @pytest.mark.parametrize("repo_url", [
+        "https://gitlab.com/owner/repo",
+        "https://github.com/owner",
+        "https://github.com/owner/repo/pull/1",
+    ])
+    def test_invalid_url_raises(self, repo_url):
+        """Test URLs that do not point at a GitHub repository are rejected"""
+        with pytest.raises(ValueError, match="Invalid GitHub repository URL"):
+            _extract_repo_info(repo_url)
+
+
+def _mock_pr_file(filename, patch_text):
+    """Build a PyGithub File stand-in"""
+    file = Mock()
+    file.filename = filename
+    file.status = "modified"
+    file.additions = 1
+    file.deletions = 0
+    file.changes = 1
+    file.patch = patch_text
+    file.raw_url = f"https://github.com/owner/repo/raw/{filename}"
+    file.blob_url = f"https://github.com/owner/repo/blob/{filename}"
+    return file
+
+
+def _mock_pr(head_sha="abc123", title="Test PR"):
+    """Build a PyGithub PullRequest stand-in with two changed files"""
+    pr = Mock()
+    pr.title = title
+    pr.head.sha = head_sha
+    pr.created_at = datetime(2025, 1, 1)
+    pr.updated_at = datetime(2025, 1, 2)
+    pr.get_files.side_effect = lambda: iter([
+        _mock_pr_file("a.py", "+print('a')"),
+        _mock_pr_file("image.png", None),
+    ])
+    return pr
+
+
+class _StatefulGithub:
+    """Github stand-in that, like PyGithub's connection, holds the in-flight request on the client"""
+    
+    def __init__(self, barrier):
+        self.barrier = barrier
+        self.pending = None
+    
+    def get_repo(self, name):
+        self.pending = name
+        # Let the other fetch start its own request before this one is answered
+        self.barrier.wait(timeout=5)
+        return Mock(get_pull=lambda number: _mock_pr(title=self.pending))
+
+
+@pytest.fixture(autouse=True)
+def github_clients(monkeypatch):
+    """Make every test build its own (mocked) GitHub clients"""
+    monkeypatch.setattr(github_service, "_thread_clients", threading.local())
+
+
+class TestFetchPRData:
+    """Test fetching PR data through PyGithub"""
+    
+    def _fetch(self, mock_pr):
+        # Drop the client cached by a previous fetch so this PR's mock is used
+        github_service._thread_clients.__dict__.clear()
+        with patch('app.services.github_service.Github') as mock_github:
+            mock_github.return_value.get_repo.return_value.get_pull.return_value = mock_pr
+            return fetch_pr_data("https://github.com/owner/repo", 1, "token")
+    
+    def test_fetch_pr_data_lists_files_once(self):
+        """Test the files and diff are built from a single get_files() call"""
+        mock_pr = _mock_pr()
+        
+        pr_data = self._fetch(mock_pr)
+        
+        mock_pr.get_files.assert_called_once_with()
+        assert [file["filename"] for file in pr_data["files"]] == ["a.py", "image.png"]
+        assert pr_data["diff"] == "--- a/a.py\n+++ b/a.py\n+print('a')"
+    
+    def test_fetch_pr_data_reuses_cached_files_for_same_head(self):
+        """Test a second fetch of the same head commit skips the files listing"""
+        first = self._fetch(_mock_pr())
+        
+        mock_pr = _mock_pr()
+        second = self._fetch(mock_pr)
+        
+        mock_pr.get_files.assert_not_called()
+        assert second["files"] == first["files"]
+        assert second["diff"] == first["diff"]
+    
+    def test_fetch_pr_data_refetches_files_for_new_head(self):
+        """Test a new head commit is never served from the cache"""
+        self._fetch(_mock_pr(head_sha="abc123"))
+        
+        mock_pr = _mock_pr(head_sha="def456")
+        self._fetch(mock_pr)
+        
+        mock_pr.get_files.assert_called_once_with()
+    
+    def test_fetch_pr_data_reuses_github_client(self):
+        """Test the GitHub client is created once per token and left open"""
+        with patch('app.services.github_service.Github') as mock_github:
+            mock_github.return_value.get_repo.return_value.get_pull.side_effect = (
+                lambda number: _mock_pr(head_sha=f"sha{number}")
+            )
+            
+            fetch_pr_data("https://github.com/owner/repo", 1, "token")
+            fetch_pr_data("https://github.com/owner/repo", 2, "token")
+        
+        mock_github.assert_called_once_with(
+            "token", per_page=github_service.GITHUB_PAGE_SIZE, timeout=github_service.GITHUB_TIMEOUT
+        )
+        mock_github.return_value.close.assert_not_called()
+    
+    def test_fetch_pr_data_concurrent_threads_use_own_clients(self):
+        """Test concurrent fetches on worker threads never share a GitHub client's in-flight request"""
+        barrier = threading.Barrier(2)
+        repos = ["alice/x", "bob/y"]
+        
+        with patch('app.services.github_service.Github', side_effect=lambda *args, **kwargs: _StatefulGithub(barrier)):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                titles = list(pool.map(
+                    lambda repo: fetch_pr_data(f"https://github.com/{repo}", 1)["title"], repos
+                ))
+        
+        assert titles == repos
@@ -1,9 +1,37 @@
 import pytest
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from app.services import llm_service
 from app.services.llm_service import LLMService
 from app.models.schemas import IssueType
 
 
+SAMPLE_PR_DATA = {
+    "title": "Test PR",
+    "description": "Test description",
+    "files": [
+        {
+            "filename": "test.py",
+            "status": "modified",
+            "additions": 5,
+            "deletions": 2,
+            "patch": "mock patch content"
+        }
+    ]
+}
+
+
+def _chat_response(content, finish_reason="stop"):
+    """Build a chat completion shaped like the OpenAI SDK's response"""
+    choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+    return SimpleNamespace(choices=[choice])
+
+
+@pytest.fixture(scope="module")
+def built_prompt():
+    """The analysis prompt for SAMPLE_PR_DATA, built once for the module"""
+    return LLMService()._build_analysis_prompt(SAMPLE_PR_DATA)
+
+
 class TestLLMService:
     """Test LLM service functionality"""
     
@@ -12,23 +40,29 @@ class TestLLMService:
         service = LLMService()
         assert service.model == "gpt-4o-mini"
     
-    def test_llm_service_with_openai_key(self):
+    def test_llm_service_with_openai_key(self, openai_client):
         """Test LLM service initializes with OpenAI key"""
-        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
-            service = LLMService()
-            assert service.client is not None
+        service = LLMService()
+        assert service.client is openai_client
     
+    def test_llm_service_reuses_openai_client(self, openai_client):
+        """Test services created with the same key share one OpenAI client"""
+        first = LLMService()
+        second = LLMService()
+        
+        assert first.client.api_key == 'test-key'
+        assert first.client.timeout == llm_service.OPENAI_TIMEOUT
+        assert first.client is second.client
+    
+    @pytest.mark.usefixtures("no_openai_env")
     def test_llm_service_without_openai_key(self):
         """Test LLM service without OpenAI key"""
-        with patch.dict('os.environ', {}, clear=True):
-            service = LLMService()
-            assert service.client is None
+        service = LLMService()
+        assert service.client is None
     
-    def test_analyze_code_with_ai_success(self):
+    def test_analyze_code_with_ai_success(self, openai_client, built_prompt):
         """Test successful AI code analysis"""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = '''
+        mock_response = _chat_response('''
         {
           "files": [
             {
@@ -49,35 +83,69 @@ class TestLLMService:
             "critical_issues": 0
           }
         }
-        '''
+        ''')
         
-        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
-            with patch('app.services.llm_service.OpenAI') as mock_openai:
-                mock_client = Mock()
-                mock_client.chat.completions.create.return_value = mock_response
-                mock_openai.return_value = mock_client
-                
-                service = LLMService()
-                pr_data = {
-                    "title": "Test PR",
-                    "description": "Test description",
-                    "files": [
-                        {
-                            "filename": "test.py",
-                            "status": "modified",
-                            "additions": 5,
-                            "deletions": 2,
-                            "patch": "mock patch content"
-                        }
-                    ]
-                }
-                
-                result = service.analyze_code_with_ai(pr_data)
-                
-                assert result["files"][0]["name"] == "test.py"
-                assert len(result["files"][0]["issues"]) == 1
-                assert result["files"][0]["issues"][0]["type"] == "style"
-                assert result["summary"]["total_issues"] == 1
+        openai_client.response = mock_response
+        
+        service = LLMService()
+        
+        result = service.analyze_code_with_ai(SAMPLE_PR_DATA)
+        
+        assert result["files"][0]["name"] == "test.py"
+        assert len(result["files"][0]["issues"]) == 1
+        assert result["files"][0]["issues"][0]["type"] == "style"
+        assert result["summary"]["total_issues"] == 1
+        
+        call_kwargs = openai_client.calls[-1]
+        assert call_kwargs["response_format"] == {"type": "json_object"}
+        assert call_kwargs["messages"][1]["content"] == built_prompt
+    
+    def test_analyze_code_with_ai_reuses_cached_reply(self, openai_client):
+        """Test an identical prompt is answered from the cache without calling OpenAI"""
+        mock_response = _chat_response(
+            '{"files": [], "summary": {"total_files": 1, "total_issues": 0, "critical_issues": 0}}'
+        )
+        pr_data = {
+            "title": "Test PR",
+            "files": [{"filename": "test.py", "status": "modified", "additions": 1, "deletions": 0, "patch": "+x"}]
+        }
+        
+        openai_client.response = mock_response
+        
+        first = LLMService().analyze_code_with_ai(pr_data)
+        second = LLMService().analyze_code_with_ai(pr_data)
+        
+        assert len(openai_client.calls) == 1
+        assert second == first
+    
+    def test_analyze_code_with_ai_cache_keyed_on_request_settings(self, openai_client, monkeypatch):
+        """Test changing a request setting such as max_tokens bypasses earlier cached replies"""
+        openai_client.response = _chat_response(
+            '{"files": [], "summary": {"total_files": 0, "total_issues": 0, "critical_issues": 0}}'
+        )
+        pr_data = {"title": "Test PR", "files": []}
+        service = LLMService()
+        
+        service.analyze_code_with_ai(pr_data)
+        build_request = LLMService._build_chat_request
+        monkeypatch.setattr(
+            LLMService, "_build_chat_request", lambda self, prompt: {**build_request(self, prompt), "max_tokens": 100}
+        )
+        service.analyze_code_with_ai(pr_data)
+        
+        assert len(openai_client.calls) == 2
+    
+    def test_analyze_code_with_ai_does_not_cache_truncated_reply(self, openai_client):
+        """Test replies cut off by the token limit are not cached"""
+        mock_response = _chat_response('{"files": [', finish_reason="length")
+        pr_data = {"title": "Test PR", "files": []}
+        
+        openai_client.response = mock_response
+        
+        LLMService().analyze_code_with_ai(pr_data)
+        LLMService().analyze_code_with_ai(pr_data)
+        
+        assert len(openai_client.calls) == 2
     
     def test_analyze_code_with_ai_no_client(self):
         """Test AI analysis without OpenAI client"""
@@ -89,43 +157,43 @@ class TestLLMService:
         with pytest.raises(ValueError, match="OpenAI API key not configured"):
             service.analyze_code_with_ai(pr_data)
     
-    def test_analyze_code_with_ai_openai_error(self):
+    def test_analyze_code_with_ai_openai_error(self, openai_client):
         """Test AI analysis with OpenAI error"""
-        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
-            with patch('app.services.llm_service.OpenAI') as mock_openai:
-                mock_client = Mock()
-                mock_client.chat.completions.create.side_effect = Exception("API Error")
-                mock_openai.return_value = mock_client
-                
-                service = LLMService()
-                pr_data = {"title": "Test", "files": []}
-                
-                with pytest.raises(Exception, match="AI analysis failed"):
-                    service.analyze_code_with_ai(pr_data)
-    
-    def test_build_analysis_prompt(self):
+        openai_client.error = Exception("API Error")
+        
+        service = LLMService()
+        pr_data = {"title": "Test", "files": []}
+        
+        with pytest.raises(Exception, match="AI analysis failed"):
+            service.analyze_code_with_ai(pr_data)
+    
+    def test_build_analysis_prompt(self, built_prompt):
         """Test analysis prompt building"""
+        assert "Test PR" in built_prompt
+        assert "test.py" in built_prompt
+        assert "mock patch content" in built_prompt
+        assert "JSON format" in built_prompt
+    
+    def test_build_analysis_prompt_binary_file(self):
+        """Test files without a patch (e.g. binaries) do not break the prompt"""
         service = LLMService()
         pr_data = {
             "title": "Test PR",
-            "description": "Test description",
             "files": [
                 {
-                    "filename": "test.py",
-                    "status": "modified",
-                    "additions": 5,
-                    "deletions": 2,
-                    "patch": "mock patch content"
+                    "filename": "logo.png",
+                    "status": "added",
+                    "additions": 0,
+                    "deletions": 0,
+                    "patch": None
                 }
             ]
         }
         
         prompt = service._build_analysis_prompt(pr_data)
         
-        assert "Test PR" in prompt
-        assert "test.py" in prompt
-        assert "mock patch content" in prompt
-        assert "JSON format" in prompt
+        assert "File: logo.png" in prompt
+        assert "```diff\n\n```" in prompt
     
     def test_parse_ai_response_valid_json(self):
         """Test parsing valid AI response"""
@@ -144,6 +212,29 @@ class TestLLMService:
         assert result["files"][0]["name"] == "test.py"
         assert result["summary"]["total_files"] == 1
     
+    def test_parse_ai_response_repairs_off_schema_json(self):
+        """Test JSON that fails schema validation is repaired instead of discarded"""
+        service = LLMService()
+        response_text = '''
+        {
+          "files": [
+            {
+              "name": "test.py",
+              "issues": [
+                {"type": "security", "line": null, "description": "Issue", "suggestion": "Fix"}
+              ]
+            }
+          ]
+        }
+        '''
+        
+        pr_data = {"files": [{"filename": "test.py"}]}
+        result = service._parse_ai_response(response_text, pr_data)
+        
+        assert result["files"][0]["issues"][0]["type"] == "best_practice"
+        assert result["files"][0]["issues"][0]["line"] == 1
+        assert result["summary"]["total_files"] == 1
+    
     def test_parse_ai_response_invalid_json(self):
         """Test parsing invalid AI response"""
         service = LLMService()
@@ -195,4 +286,4 @@ class TestLLMService:
         
         assert result["files"][0]["name"] == "AI Analysis"
         assert "Test error" in result["files"][0]["issues"][0]["description"]
-        assert result["summary"]["total_files"] == 1
\ No newline at end of file
+        assert result["summary"]["total_files"] == 1
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
 """Test the code review system with a real GitHub repository"""
 
-import json
-import requests
+import asyncio
 import time
+import httpx
 
-def test_pr_analysis():
+API_URL = "http://localhost:8000"
+
+# Poll quickly at first, backing off to at most MAX_POLL_DELAY seconds between polls
+MAX_POLL_DELAY = 2.0
+POLL_TIMEOUT = 60.0
+
+async def test_pr_analysis(client: httpx.AsyncClient):
     """Test PR analysis with the current repository"""
     
     # Use your actual repository for testing
@@ -22,8 +28,8 @@ def test_pr_analysis():
     
     try:
         # Submit the analysis
-        response = requests.post(
-            "http://localhost:8000/analyze-pr",
+        response = await client.post(
+            "/analyze-pr",
             json=payload,
             headers={"Content-Type": "application/json"}
         )
@@ -39,19 +45,23 @@ def test_pr_analysis():
         
         # Poll for results
         print("Waiting for analysis to complete...")
-        max_attempts = 30
+        deadline = time.monotonic() + POLL_TIMEOUT
+        etag = None
+        attempt = 0
         
-        for attempt in range(max_attempts):
-            status_response = requests.get(f"http://localhost:8000/status/{task_id}")
+        while time.monotonic() < deadline:
+            # A 304 means the status is unchanged since the last poll
+            headers = {"If-None-Match": etag} if etag else {}
+            status_response = await client.get(f"/status/{task_id}", headers=headers)
             
             if status_response.status_code == 200:
-                status_data = status_response.json()
-                status = status_data["status"]
+                etag = status_response.headers.get("ETag")
+                status = status_response.json()["status"]
                 print(f"Status: {status}")
                 
                 if status == "completed":
                     # Get results
-                    results_response = requests.get(f"http://localhost:8000/results/{task_id}")
+                    results_response = await client.get(f"/results/{task_id}")
                     if results_response.status_code == 200:
                         results = results_response.json()
                         print("✅ Analysis completed successfully!")
@@ -63,32 +73,33 @@ def test_pr_analysis():
                         return False
                 
                 elif status == "failed":
-                    results_response = requests.get(f"http://localhost:8000/results/{task_id}")
+                    results_response = await client.get(f"/results/{task_id}")
                     if results_response.status_code == 200:
                         results = results_response.json()
                         print(f"❌ Analysis failed: {results.get('error', 'Unknown error')}")
                     return False
-                
-            time.sleep(2)
+            
+            await asyncio.sleep(min(MAX_POLL_DELAY, 0.1 * 1.5 ** attempt))
+            attempt += 1
         
         print("❌ Analysis timed out")
         return False
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ Cannot connect to API server. Make sure it's running on localhost:8000")
         return False
     except Exception as e:
         print(f"❌ Test failed: {e}")
         return False
 
-def test_webhook_endpoint():
+async def test_webhook_endpoint(client: httpx.AsyncClient):
     """Test the webhook endpoint"""
     print("\nTesting webhook endpoint...")
     
     # Simple ping test
     try:
-        response = requests.post(
-            "http://localhost:8000/webhook/github",
+        response = await client.post(
+            "/webhook/github",
             json={"action": "ping"},
             headers={
                 "X-GitHub-Event": "ping",
@@ -103,19 +114,21 @@ def test_webhook_endpoint():
             print(f"❌ Webhook endpoint returned: {response.status_code}")
             return False
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ Cannot connect to webhook endpoint")
         return False
 
+async def main():
+    """Run the webhook and PR analysis checks concurrently over one connection pool"""
+    async with httpx.AsyncClient(base_url=API_URL) as client:
+        return await asyncio.gather(test_webhook_endpoint(client), test_pr_analysis(client))
+
 if __name__ == "__main__":
     print("🚀 Testing Code Review Agent")
     print("=" * 50)
     
-    # Test webhook first (simpler)
-    webhook_success = test_webhook_endpoint()
-    
-    # Test PR analysis (more complex)
-    analysis_success = test_pr_analysis()
+    # Both checks are network-bound, so the script takes as long as the slower one
+    webhook_success, analysis_success = asyncio.run(main())
     
     print("\n" + "=" * 50)
     print("Test Results:")